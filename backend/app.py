@@ -1,39 +1,107 @@
 import base64
+import hmac
+import json
 import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
 
-import cv2
-import numpy as np
-from PIL import Image
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
 
+from handlers.batcher import GeminiBatcher
+from handlers.decoder import decode_frame
 from handlers.detector import YOLOTextDetector
+from handlers.fake_llm import FakeGeminiWrapper
+from handlers.frame_queue import FrameQueue
+from handlers.history import HistoryStore
 from handlers.llm import GeminiWrapper
+from handlers.ocr import LocalOCR
+from handlers.profiler import MemoryProfiler, SamplingProfiler
+from handlers.scheduler import create_scheduler
+from handlers.usage import UsageTracker
+from settings import APP_SETTINGS
 
 load_dotenv()
 
 # Initialize the application
+# FAKE_GEMINI_LATENCY swaps in a local fake Gemini for load testing (see loadtest.py)
+fake_gemini_latency = os.environ.get("FAKE_GEMINI_LATENCY")
 api_key = os.environ.get("GEMINI_API_KEY")
-if not api_key:
+if not api_key and fake_gemini_latency is None:
     print("Error: GEMINI_API_KEY not set")
     exit(1)
 
 app = Flask(__name__)
 # Enable CORS with additional configuration for larger payloads
 CORS(app, resources={r"/*": {"origins": "*", "max_age": 86400}})
+sock = Sock(app)
+
+# Admin endpoints (profiling) are disabled unless ADMIN_TOKEN is set
+admin_token = os.environ.get("ADMIN_TOKEN")
+cpu_profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
 
 # Global variables
 frame_lock = threading.Lock()
 results_lock = threading.Lock()
-is_analyzing = False
+schedulers = {}  # Adaptive analysis schedulers keyed by source
+schedulers_lock = threading.Lock()
+
+# Gemini token, cost and latency accounting per session and endpoint
+usage = UsageTracker(
+    input_price=APP_SETTINGS["gemini_input_price"],
+    output_price=APP_SETTINGS["gemini_output_price"],
+    session_token_budget=APP_SETTINGS["session_token_budget"],
+    budget_window=APP_SETTINGS["session_budget_window"],
+    max_sessions=APP_SETTINGS["usage_max_sessions"]
+)
 
 # Initialize Gemini and YOLO detector
-llm = GeminiWrapper(api_key)
+if fake_gemini_latency is not None:
+    llm = FakeGeminiWrapper(
+        latency=float(fake_gemini_latency),
+        error_rate=float(os.environ.get("FAKE_GEMINI_ERROR_RATE", 0)),
+        usage=usage
+    )
+else:
+    llm = GeminiWrapper(api_key, usage=usage)
 detector = YOLOTextDetector("yolov8n")  # Initialize the YOLO detector
 
+# Region crops from concurrent requests are grouped into multi-image Gemini calls
+if APP_SETTINGS["gemini_batch_size"] > 1:
+    gemini = GeminiBatcher(
+        llm,
+        max_batch=APP_SETTINGS["gemini_batch_size"],
+        window=APP_SETTINGS["gemini_batch_window"]
+    )
+    gemini.start()
+else:
+    gemini = llm
+# Local OCR fast path for simple text regions
+if APP_SETTINGS["local_ocr_enabled"]:
+    local_ocr = LocalOCR(
+        min_confidence=APP_SETTINGS["local_ocr_min_confidence"],
+        max_words=APP_SETTINGS["local_ocr_max_words"]
+    )
+else:
+    local_ocr = None
+region_pool = ThreadPoolExecutor(max_workers=APP_SETTINGS["max_regions"] * APP_SETTINGS["analysis_workers"],
+                                 thread_name_prefix="region")
+
+# Searchable history of past analyses, written in batches off the request path
+# Relative paths are kept next to the backend code, not in whatever directory the server started from
+history = HistoryStore(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), APP_SETTINGS["history_db"]),
+    batch_size=APP_SETTINGS["history_batch_size"],
+    flush_interval=APP_SETTINGS["history_flush_interval"]
+)
+history.start()
+
 # Analysis prompt
 ANALYSIS_PROMPT = """
 Analyze this whiteboard image from a classroom setting. Focus on:
@@ -49,36 +117,67 @@ Keep explanations clear, concise, and focused on helping students understand the
 """
 
 
-def analyze_region(img, box, region_index):
-    """Analyze a specific region of the image"""
+def get_scheduler(source):
+    """Get or create the adaptive scheduler for a client source"""
+    with schedulers_lock:
+        if source not in schedulers:
+            # Session IDs change on every page load; drop schedulers of sources that went away
+            now = time.time()
+            for key in [key for key, scheduler in schedulers.items()
+                        if scheduler.idle_time(now) > APP_SETTINGS["scheduler_idle_timeout"]]:
+                del schedulers[key]
+            # Remote clients only show activity on frames they send, so keep their backoff short
+            schedulers[source] = create_scheduler(max_interval=APP_SETTINGS["remote_max_analyze_interval"])
+        return schedulers[source]
+
+
+def get_capture_profile():
+    """Capture settings that match what the detector and Gemini actually use"""
+    # Detection needs at least the YOLO input size; Gemini never receives more than its max size
+    max_edge = max(detector.input_size, min(APP_SETTINGS["capture_max_edge"], max(llm.max_image_size)))
+    return {
+        "maxEdge": max_edge,
+        "jpegQuality": APP_SETTINGS["capture_jpeg_quality"],
+        "roi": APP_SETTINGS["capture_roi"],
+        "detectorInputSize": detector.input_size,
+        "llmMaxImageSize": max(llm.max_image_size)
+    }
+
+
+def analyze_region(frame, box, region_index, context=None, max_edge=None, gemini_times=None):
+    """Analyze a specific region of the image, shrinking the crop to max_edge if given
+
+    Gemini call durations are appended to gemini_times so the scheduler can pace by real API latency.
+    """
     try:
-        # Extract coordinates
-        x1, y1, x2, y2 = map(int, box)
-
-        # Ensure boundaries are within frame
-        h, w = img.shape[:2]
-        x1 = max(0, x1)
-        y1 = max(0, y1)
-        x2 = min(w, x2)
-        y2 = min(h, y2)
+        # Map the detection box (preview coordinates) onto the full-resolution frame
+        x1, y1, x2, y2 = frame.to_full_box(box)
 
         # Skip invalid regions
         if x2 <= x1 or y2 <= y1:
             print(f"Invalid region dimensions: {x1},{y1},{x2},{y2}")
             return None
 
-        # Crop the region
-        crop = img[y1:y2, x1:x2]
-        if crop.size == 0:
+        # Crop the region from full-resolution pixels, already RGB for Gemini
+        pil_crop = frame.crop(box)
+        if pil_crop is None:
             print("Empty crop, skipping region")
             return None
-
-        # Convert OpenCV BGR to PIL RGB
-        pil_crop = Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
-
-        # Get analysis from LLM
-        print(f"Sending whiteboard region {region_index} to Gemini API...")
-        response = llm.analyze_image(pil_crop, ANALYSIS_PROMPT)
+        if max_edge:
+            # crop() may return the frame's cached full image; shrink a copy so other crops stay valid
+            pil_crop = pil_crop.copy()
+            pil_crop.thumbnail((max_edge, max_edge))
+
+        # Plain printed text is answered in-process; everything else goes to Gemini
+        response = local_ocr.try_answer(pil_crop) if local_ocr is not None else None
+        source = "local_ocr" if response is not None else "gemini"
+
+        if response is None:
+            print(f"Sending whiteboard region {region_index} to Gemini API...")
+            gemini_start = time.time()
+            response = gemini.analyze_image(pil_crop, ANALYSIS_PROMPT, context=context)
+            if gemini_times is not None:
+                gemini_times.append(time.time() - gemini_start)
 
         if response.startswith("Error:"):
             print(f"Gemini API error for region {region_index}: {response}")
@@ -104,13 +203,11 @@ def analyze_region(img, box, region_index):
             display_label = subject_marker + response
 
         # Calculate normalized boundingBox for frontend
-        img_height, img_width = img.shape[:2]
-
         boundingBox = {
-            "x": float(x1) / img_width,
-            "y": float(y1) / img_height,
-            "width": float(x2 - x1) / img_width,
-            "height": float(y2 - y1) / img_height
+            "x": float(x1) / frame.width,
+            "y": float(y1) / frame.height,
+            "width": float(x2 - x1) / frame.width,
+            "height": float(y2 - y1) / frame.height
         }
 
         # Return the analysis result
@@ -120,7 +217,8 @@ def analyze_region(img, box, region_index):
             "fact": response if len(response) < 100 else response[:97] + "...",
             "full_text": response,
             "boundingBox": boundingBox,
-            "confidence": 1.0  # Default confidence
+            "confidence": 1.0,  # Default confidence
+            "source": source
         }
 
     except Exception as e:
@@ -128,125 +226,190 @@ def analyze_region(img, box, region_index):
         return None
 
 
+def decode_image(image_data):
+    """Decode image bytes at reduced resolution for detection, or None if invalid"""
+    return decode_frame(image_data, detect_max_edge=detector.input_size)
+
+
+def run_analysis(frame, session_id, start_time, endpoint=None):
+    """Run YOLO detection and Gemini analysis on a decoded image and build the response payload"""
+    # Detection and scene-change checks only need the reduced preview
+    img = frame.preview
+
+    # Log image dimensions
+    h, w = img.shape[:2]
+    print(f"Processing image: {frame.width}x{frame.height} pixels (detecting at {w}x{h})")
+
+    # Measure board activity for this source to adapt its capture interval
+    scheduler = get_scheduler(session_id)
+    scheduler.observe(img)
+
+    # Sessions over their token budget get smaller crops, fewer regions and a longer interval
+    over_budget = usage.budget_exceeded(session_id)
+    scheduler.set_budget_factor(APP_SETTINGS["budget_interval_factor"] if over_budget else 1.0)
+    max_regions = APP_SETTINGS["budget_max_regions"] if over_budget else APP_SETTINGS["max_regions"]
+    max_edge = APP_SETTINGS["budget_max_image_edge"] if over_budget else None
+    context = {"session": session_id, "endpoint": endpoint}
+    gemini_times = []
+    if over_budget:
+        print(f"Session {session_id} is over its token budget, using cheaper analysis")
+
+    # Step 1: Detect regions with YOLO
+    print("Running YOLO detection...")
+    regions = detector.detect_text(img)
+
+    if not regions:
+        print("No regions detected by YOLO")
+        # If no regions detected, analyze the whole image
+        regions = [{"label": "Full Frame", "box": [0, 0, w, h]}]
+
+    print(f"YOLO detected {len(regions)} regions")
+
+    # Sort regions by area (larger regions first)
+    sorted_regions = sorted(regions,
+                            key=lambda r: (r['box'][2] - r['box'][0]) * (r['box'][3] - r['box'][1]),
+                            reverse=True)
+
+    # Take only the largest regions to analyze (for efficiency)
+    regions_to_analyze = sorted_regions[:max_regions]
+    print(f"Analyzing {len(regions_to_analyze)} largest regions")
+
+    # Analyze regions concurrently so their crops can share one batched Gemini request
+    def analyze_indexed_region(item):
+        idx, region = item
+        box = region['box']
+        print(f"Processing region {idx + 1}, box: {box}")
+        return analyze_region(frame, box, idx, context, max_edge, gemini_times)
+
+    detections = [result for result in region_pool.map(analyze_indexed_region, enumerate(regions_to_analyze))
+                  if result]
+
+    # If no successful detections, fallback to analyzing the whole image
+    if not detections:
+        print("No successful region analyses, analyzing whole image")
+        pil_image = frame.full()
+        if max_edge:
+            pil_image = pil_image.copy()
+            pil_image.thumbnail((max_edge, max_edge))
+
+        # Send to Gemini API
+        print("Sending full image to Gemini API...")
+        gemini_start = time.time()
+        response = gemini.analyze_image(pil_image, ANALYSIS_PROMPT, context=context)
+        gemini_times.append(time.time() - gemini_start)
+
+        if not response.startswith("Error:"):
+            # Format the response for the frontend
+            subject_marker = ""
+            if "math" in response.lower() or "equation" in response.lower():
+                subject_marker = "📐 "
+            elif "science" in response.lower() or "physics" in response.lower():
+                subject_marker = "🔬 "
+
+            detections = [{
+                "id": 1,
+                "title": subject_marker + "Whiteboard Analysis",
+                "fact": response if len(response) < 100 else response[:97] + "...",
+                "full_text": response,
+                "boundingBox": {"x": 0.1, "y": 0.1, "width": 0.8, "height": 0.8}
+            }]
+
+    # Full-resolution pixels are no longer needed once Gemini has its crops
+    frame.release()
+
+    # Log processing time
+    elapsed_time = time.time() - start_time
+    print(f"Analysis completed in {elapsed_time:.2f} seconds with {len(detections)} detections")
+
+    # Pace by Gemini latency only; queue wait, decode and detection are not API cost
+    scheduler.record_analysis(max(gemini_times) if gemini_times else None)
+    history.record(session_id, detections, timestamp=start_time)
+    schedule = scheduler.status()
+    print(f"Next analysis in {schedule['interval']:.1f}s (activity {schedule['activity']:.3f})")
+
+    # Return detections in the format expected by the frontend
+    return {
+        "status": "success",
+        "processingTime": elapsed_time,
+        "detections": detections,
+        "nextInterval": schedule['interval'],
+        "schedule": schedule,
+        "budget": dict(usage.status(session_id)["budget"], exceeded=over_budget)
+    }
+
+
+def process_frame(session_id, image_data, start_time, endpoint=None):
+    """Decode and analyze one frame taken from the frame queue"""
+    frame = decode_image(image_data)
+    if frame is None:
+        raise ValueError("Could not decode image")
+    return run_analysis(frame, session_id, start_time, endpoint)
+
+
+def frame_outcome(ticket):
+    """Build the response payload and HTTP status for a finished frame ticket"""
+    if ticket.status == "done":
+        return ticket.result, 200
+    if ticket.status in ("superseded", "expired"):
+        # Older frames are worthless once a newer one arrives or their deadline passes
+        return {
+            "status": "dropped",
+            "reason": ticket.status,
+            "message": f"Frame {ticket.status} before analysis"
+        }, 200
+    if ticket.status == "error":
+        if isinstance(ticket.error, ValueError):
+            return {"status": "error", "message": str(ticket.error)}, 400
+        return {"status": "error", "message": f"Error processing image: {ticket.error}"}, 500
+    return {"status": "error", "message": "Timed out waiting for analysis"}, 504
+
+
+# Per-client latest-wins queue; workers serve sessions round-robin so one busy room cannot starve others
+frame_queue = FrameQueue(process_frame, workers=APP_SETTINGS["analysis_workers"])
+frame_queue.start()
+
+
+def get_frame_deadline(requested=None):
+    """Seconds a frame may wait for analysis, optionally shortened by the client"""
+    deadline = APP_SETTINGS["frame_deadline"]
+    try:
+        if requested is not None:
+            deadline = min(deadline, max(0.0, float(requested)))
+    except (TypeError, ValueError):
+        pass
+    return deadline
+
+
 # New API endpoint for processing images from React frontend
 @app.route('/process_image', methods=['POST'])
 def process_image():
     """Process an image sent from the React frontend"""
-    global is_analyzing
     try:
-        # Check if already analyzing
-        if is_analyzing:
-            return jsonify({
-                "status": "busy",
-                "message": "Already processing an image"
-            }), 429  # 429 Too Many Requests
-
-        is_analyzing = True
-
-        # Get start time for performance tracking
-        start_time = time.time()
         print("Received image processing request")
 
         # Get the base64 image from the request
         data = request.json
         if not data or 'image' not in data:
-            is_analyzing = False
             return jsonify({
                 "status": "error",
                 "message": "No image data provided"
             }), 400
 
-        # Decode the base64 image
         try:
             image_data = base64.b64decode(data['image'])
-            nparr = np.frombuffer(image_data, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         except Exception as e:
-            is_analyzing = False
             print(f"Error decoding image: {e}")
             return jsonify({
                 "status": "error",
                 "message": "Could not decode image"
             }), 400
 
-        if img is None:
-            is_analyzing = False
-            return jsonify({
-                "status": "error",
-                "message": "Could not decode image"
-            }), 400
-
-        # Log image dimensions
-        h, w = img.shape[:2]
-        print(f"Processing image: {w}x{h} pixels")
-
-        # Step 1: Detect regions with YOLO
-        print("Running YOLO detection...")
-        regions = detector.detect_text(img)
-
-        if not regions:
-            print("No regions detected by YOLO")
-            # If no regions detected, analyze the whole image
-            h, w = img.shape[:2]
-            regions = [{"label": "Full Frame", "box": [0, 0, w, h]}]
-
-        print(f"YOLO detected {len(regions)} regions")
-
-        # Sort regions by area (larger regions first)
-        sorted_regions = sorted(regions,
-                                key=lambda r: (r['box'][2] - r['box'][0]) * (r['box'][3] - r['box'][1]),
-                                reverse=True)
-
-        # Take at most 2 largest regions to analyze (for efficiency)
-        regions_to_analyze = sorted_regions[:min(2, len(sorted_regions))]
-        print(f"Analyzing {len(regions_to_analyze)} largest regions")
-
-        # Analyze each region
-        detections = []
-        for idx, region in enumerate(regions_to_analyze):
-            box = region['box']
-            print(f"Processing region {idx + 1}, box: {box}")
-
-            result = analyze_region(img, box, idx)
-            if result:
-                detections.append(result)
-
-        # If no successful detections, fallback to analyzing the whole image
-        if not detections:
-            print("No successful region analyses, analyzing whole image")
-            # Convert OpenCV BGR to PIL RGB
-            pil_image = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
-
-            # Send to Gemini API
-            print("Sending full image to Gemini API...")
-            response = llm.analyze_image(pil_image, ANALYSIS_PROMPT)
-
-            if not response.startswith("Error:"):
-                # Format the response for the frontend
-                subject_marker = ""
-                if "math" in response.lower() or "equation" in response.lower():
-                    subject_marker = "📐 "
-                elif "science" in response.lower() or "physics" in response.lower():
-                    subject_marker = "🔬 "
-
-                detections = [{
-                    "id": 1,
-                    "title": subject_marker + "Whiteboard Analysis",
-                    "fact": response if len(response) < 100 else response[:97] + "...",
-                    "full_text": response,
-                    "boundingBox": {"x": 0.1, "y": 0.1, "width": 0.8, "height": 0.8}
-                }]
-
-        # Log processing time
-        elapsed_time = time.time() - start_time
-        print(f"Analysis completed in {elapsed_time:.2f} seconds with {len(detections)} detections")
-
-        # Return detections in the format expected by the frontend
-        return jsonify({
-            "status": "success",
-            "processingTime": elapsed_time,
-            "detections": detections
-        })
+        # Queue the frame; a newer frame from the same session replaces it if it has not started
+        session_id = data.get('session_id') or request.remote_addr
+        ticket = frame_queue.submit(session_id, image_data, get_frame_deadline(data.get('deadline')),
+                                     endpoint='/process_image')
+        payload, status_code = frame_outcome(frame_queue.wait(ticket))
+        return jsonify(payload), status_code
 
     except Exception as e:
         print(f"Error processing image: {e}")
@@ -254,8 +417,191 @@ def process_image():
             "status": "error",
             "message": f"Error processing image: {str(e)}"
         }), 500
-    finally:
-        is_analyzing = False
+
+
+@sock.route('/ws')
+def stream_socket(ws):
+    """Persistent channel: binary JPEG frames in, analysis results pushed out"""
+    session_id = request.args.get('session_id') or request.remote_addr
+    deadline = get_frame_deadline(request.args.get('deadline'))
+    print(f"WebSocket client connected: {session_id}")
+    consecutive_errors = 0
+
+    try:
+        # Flow control: the server asks for each frame only when it is ready to analyze it
+        ws.send(json.dumps({"type": "request_frame", "delay": 0}))
+
+        while True:
+            message = ws.receive()
+            if message is None:
+                continue
+
+            # Text messages are control messages; frames are always binary
+            if isinstance(message, str):
+                try:
+                    control = json.loads(message)
+                except ValueError:
+                    control = {}
+                if control.get("type") == "ping":
+                    ws.send(json.dumps({"type": "pong"}))
+                continue
+
+            print(f"Received {len(message)} byte frame over WebSocket")
+
+            # Share the fair frame queue with HTTP clients
+            ticket = frame_queue.submit(session_id, message, deadline, endpoint='/ws')
+            payload, _ = frame_outcome(frame_queue.wait(ticket))
+
+            if payload["status"] == "success":
+                consecutive_errors = 0
+                delay = payload["nextInterval"]
+            elif payload["status"] == "dropped":
+                # A newer frame is already on its way; ask again right away
+                delay = 0
+            else:
+                # Back off on repeated failures instead of re-sending a failing frame in a tight loop
+                consecutive_errors += 1
+                delay = min(APP_SETTINGS["max_analyze_interval"],
+                            max(get_scheduler(session_id).time_until_next(), 2 ** consecutive_errors))
+
+            payload["type"] = "result"
+            ws.send(json.dumps(payload))
+            ws.send(json.dumps({"type": "request_frame", "delay": delay}))
+
+    except ConnectionClosed:
+        print(f"WebSocket client disconnected: {session_id}")
+
+
+@app.route('/api/history/search', methods=['GET'])
+def history_search():
+    """Search past whiteboard analyses across lectures"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            "status": "error",
+            "message": "Missing search query 'q'"
+        }), 400
+
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('per_page', 20))))
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "page and per_page must be integers"
+        }), 400
+
+    start_time = time.time()
+    try:
+        results = history.search(query, session=request.args.get('session'), page=page, per_page=per_page)
+    except Exception as e:
+        print(f"Error searching history: {e}")
+        return jsonify({
+            "status": "error",
+            "message": f"Error searching history: {str(e)}"
+        }), 500
+
+    results["status"] = "success"
+    results["queryTime"] = time.time() - start_time
+    return jsonify(results)
+
+
+@app.route('/api/usage', methods=['GET'])
+def api_usage():
+    """Gemini token, cost and latency totals for capacity planning"""
+    session_id = request.args.get('session')
+    result = usage.status(session_id)
+    result["status"] = "success"
+    return jsonify(result)
+
+
+@app.route('/api/capabilities', methods=['GET'])
+def api_capabilities():
+    """Tell clients the resolution, JPEG quality and region to capture at"""
+    return jsonify(get_capture_profile())
+
+
+def admin_required(view):
+    """Reject requests without the admin token (X-Admin-Token header)"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get("X-Admin-Token", "")
+        if not admin_token or not hmac.compare_digest(token.encode(), admin_token.encode()):
+            return jsonify({
+                "status": "error",
+                "message": "Admin access required"
+            }), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route('/admin/profile/cpu', methods=['GET'])
+@admin_required
+def profile_cpu():
+    """Sample all server threads for a while and return folded stacks for flamegraph tools"""
+    try:
+        duration = float(request.args.get('duration', 10))
+        rate = int(request.args.get('rate', 100))
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "duration and rate must be numbers"
+        }), 400
+
+    print(f"Starting CPU profile for {duration}s at {rate}Hz")
+    folded = cpu_profiler.profile(duration=duration, rate=rate)
+    if folded is None:
+        return jsonify({
+            "status": "busy",
+            "message": "A CPU profile is already running"
+        }), 409
+
+    return Response(folded, mimetype="text/plain", headers={
+        "Content-Disposition": f"attachment; filename=cpu_profile_{int(time.time())}.folded"
+    })
+
+
+@app.route('/admin/profile/memory/start', methods=['POST'])
+@admin_required
+def profile_memory_start():
+    """Start tracing allocations with tracemalloc"""
+    memory_profiler.start()
+    return jsonify({"status": "success", "message": "Memory tracing started"})
+
+
+@app.route('/admin/profile/memory/stop', methods=['POST'])
+@admin_required
+def profile_memory_stop():
+    """Stop tracing allocations"""
+    memory_profiler.stop()
+    return jsonify({"status": "success", "message": "Memory tracing stopped"})
+
+
+@app.route('/admin/profile/memory', methods=['GET'])
+@admin_required
+def profile_memory():
+    """Top allocators, and growth since the previous snapshot"""
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in ("lineno", "filename", "traceback"):
+        return jsonify({
+            "status": "error",
+            "message": "group_by must be lineno, filename or traceback"
+        }), 400
+
+    try:
+        limit = int(request.args.get('limit', 25))
+    except ValueError:
+        limit = 25
+
+    snapshot = memory_profiler.snapshot(limit=limit, group_by=group_by)
+    if snapshot is None:
+        return jsonify({
+            "status": "error",
+            "message": "Memory tracing is not running; POST /admin/profile/memory/start first"
+        }), 409
+
+    snapshot["status"] = "success"
+    return jsonify(snapshot)
 
 
 @app.route('/api/status', methods=['GET'])
@@ -264,7 +610,11 @@ def api_status():
     return jsonify({
         "status": "online",
         "message": "Classroom Whiteboard Analyzer API is running",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "queue": frame_queue.status(),
+        "batching": gemini.status() if isinstance(gemini, GeminiBatcher) else None,
+        "localOcr": local_ocr.status() if local_ocr is not None else None,
+        "usage": usage.status()["totals"]
     })
 
 
@@ -276,6 +626,10 @@ def home():
         "status": "running",
         "endpoints": {
             "/process_image": "POST - Analyze a whiteboard image",
+            "/ws": "WebSocket - Stream binary frames and receive pushed results",
+            "/api/history/search": "GET - Search past analyses (q, session, page, per_page)",
+            "/api/usage": "GET - Gemini token and cost totals per session, endpoint and image size (session)",
+            "/api/capabilities": "GET - Capture profile (max resolution, JPEG quality, region of interest)",
             "/api/status": "GET - Check API status"
         }
     })
@@ -283,4 +637,4 @@ def home():
 
 if __name__ == '__main__':
     # Use a higher worker timeout for handling larger images
-    app.run(host='0.0.0.0', port=8888, debug=True, threaded=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 8888)), debug=True, threaded=True)
\ No newline at end of file
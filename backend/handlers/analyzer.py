@@ -1,7 +1,7 @@
 from threading import Thread
 import time
-import cv2
-from PIL import Image
+
+from handlers.buffers import crop_to_pil
 
 
 class Analyzer(Thread):
@@ -13,6 +13,8 @@ class Analyzer(Thread):
         self.llm = None
         self.callback = None
         self.detector = None  # Will be set by setup
+        self.frame_buffer = None  # Pooled buffer backing self.frame, released when analysis ends
+        self.gemini_latency = None  # Slowest Gemini call of this analysis, for the scheduler
 
         # Improved prompt specifically for classroom whiteboard analysis
         self.prompt = """
@@ -28,9 +30,10 @@ class Analyzer(Thread):
         Keep explanations clear, concise, and focused on helping students understand the material.
         """
 
-    def setup(self, frame, llm, detector, callback):
+    def setup(self, frame, llm, detector, callback, frame_buffer=None):
         """Configure the analyzer before starting the thread"""
         self.frame = frame
+        self.frame_buffer = frame_buffer
         self.llm = llm
         self.detector = detector
         self.callback = callback
@@ -81,17 +84,14 @@ class Analyzer(Thread):
                         print(f"Invalid region dimensions: {x1},{y1},{x2},{y2}")
                         continue
 
-                    crop = self.frame[y1:y2, x1:x2]
-                    if crop.size == 0:
-                        print("Empty crop, skipping region")
-                        continue
-
-                    # Convert OpenCV BGR image to PIL RGB image for Gemini
-                    pil_crop = Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
+                    # Crop is a view into the frame; convert BGR to RGB for Gemini in a single copy
+                    pil_crop = crop_to_pil(self.frame, x1, y1, x2, y2)
 
                     print(f"Sending whiteboard region {idx + 1} to Gemini API...")
                     # Get analysis from LLM
+                    gemini_start = time.time()
                     response = self.llm.analyze_image(pil_crop, self.prompt)
+                    self.gemini_latency = max(self.gemini_latency or 0.0, time.time() - gemini_start)
 
                     if response.startswith("Error:"):
                         print(f"Gemini API error for region {idx + 1}: {response}")
@@ -142,6 +142,13 @@ class Analyzer(Thread):
     def run(self):
         """Thread execution method"""
         start_time = time.time()
-        self.analyze()
+        try:
+            self.analyze()
+        finally:
+            # Hand the frame buffer back to the capture pool and drop our reference to its pixels
+            self.frame = None
+            if self.frame_buffer is not None:
+                self.frame_buffer.release()
+                self.frame_buffer = None
         elapsed = time.time() - start_time
         print(f"Classroom whiteboard analysis completed in {elapsed:.2f} seconds")
\ No newline at end of file
@@ -0,0 +1,169 @@
+import os
+import time
+from collections import deque
+from datetime import datetime
+from threading import Condition, Thread
+
+import cv2
+
+from handlers.buffers import FrameBuffer
+
+
+class FrameArchiver(Thread):
+    """Background writer that archives frames into rolling video segments with size/age retention"""
+
+    def __init__(self, directory, fps=10, segment_seconds=60, max_bytes=500 * 1024 * 1024,
+                 max_age=7 * 24 * 3600, queue_size=32):
+        super().__init__(name="archive_thread", daemon=True)
+        self.directory = directory
+        self.fps = fps
+        self.segment_seconds = segment_seconds
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        # Bounded queue: when full, appending drops the oldest frame instead of blocking capture
+        self.queue = deque(maxlen=queue_size)
+        self.condition = Condition()
+        self.running = True
+        self.dropped = 0
+        self.next_frame_time = 0  # Frames arriving before this are skipped to hold the segment frame rate
+
+        self.writer = None
+        self.segment_path = None
+        self.segment_start = 0
+        self.segment_size = None
+
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+
+    def due(self, now=None):
+        """Whether the next submitted frame would be archived, so callers can skip preparing one"""
+        now = time.time() if now is None else now
+        return now >= self.next_frame_time
+
+    def submit(self, frame):
+        """Queue a frame (array or pooled FrameBuffer) without blocking; returns False if an older frame was dropped"""
+        now = time.time()
+        if not self.due(now):
+            # Capture runs faster than the archive frame rate; skip so segments play back at real speed
+            if isinstance(frame, FrameBuffer):
+                frame.release()
+            return True
+        interval = 1.0 / self.fps
+        # Keep a steady cadence, but don't try to catch up after a gap
+        self.next_frame_time = self.next_frame_time + interval if now - self.next_frame_time < interval else now + interval
+
+        oldest = None
+        with self.condition:
+            dropped = len(self.queue) == self.queue.maxlen
+            if dropped:
+                self.dropped += 1
+                oldest = self.queue.popleft()
+            self.queue.append(frame)
+            self.condition.notify()
+
+        if isinstance(oldest, FrameBuffer):
+            oldest.release()
+        return not dropped
+
+    def stop(self):
+        """Flush queued frames, close the current segment and stop the thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.join()
+
+    def _open_segment(self, frame):
+        """Start a new video segment sized for this frame"""
+        height, width = frame.shape[:2]
+        # Microsecond timestamps keep segment names unique
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        self.segment_path = os.path.join(self.directory, f"segment_{timestamp}.mp4")
+        self.writer = cv2.VideoWriter(
+            self.segment_path,
+            cv2.VideoWriter_fourcc(*"mp4v"),
+            self.fps,
+            (width, height)
+        )
+        self.segment_start = time.time()
+        self.segment_size = (width, height)
+        print(f"Started archive segment: {self.segment_path}")
+
+    def _close_segment(self):
+        """Finish the current segment and apply retention"""
+        if self.writer is None:
+            return
+        self.writer.release()
+        print(f"Closed archive segment: {self.segment_path}")
+        self.writer = None
+        self.segment_path = None
+        self.enforce_retention()
+
+    def _write(self, frame):
+        """Append a frame to the current segment, rolling over when needed"""
+        height, width = frame.shape[:2]
+        if self.writer is not None and (
+                (width, height) != self.segment_size or
+                time.time() - self.segment_start >= self.segment_seconds):
+            self._close_segment()
+
+        if self.writer is None:
+            self._open_segment(frame)
+
+        self.writer.write(frame)
+
+    def enforce_retention(self):
+        """Delete the oldest segments until the archive is within its age and size limits"""
+        try:
+            segments = []
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if path == self.segment_path or not name.startswith("segment_"):
+                    continue
+                stat = os.stat(path)
+                segments.append((stat.st_mtime, stat.st_size, path))
+
+            segments.sort()
+            now = time.time()
+            total_bytes = sum(size for _, size, _ in segments)
+
+            for mtime, size, path in segments:
+                if now - mtime <= self.max_age and total_bytes <= self.max_bytes:
+                    break
+                os.remove(path)
+                total_bytes -= size
+                print(f"Removed archive segment: {path}")
+        except Exception as e:
+            print(f"Error enforcing archive retention: {e}")
+
+    def run(self):
+        """Thread execution method"""
+        self.enforce_retention()
+
+        while True:
+            with self.condition:
+                while self.running and not self.queue:
+                    # Wake up periodically so idle segments still get closed
+                    self.condition.wait(timeout=1.0)
+                    if self.writer is not None and time.time() - self.segment_start >= self.segment_seconds:
+                        break
+                if not self.running and not self.queue:
+                    break
+                frame = self.queue.popleft() if self.queue else None
+
+            try:
+                if isinstance(frame, FrameBuffer):
+                    self._write(frame.array)
+                elif frame is not None:
+                    self._write(frame)
+                elif self.writer is not None:
+                    self._close_segment()
+            except Exception as e:
+                print(f"Error archiving frame: {e}")
+            finally:
+                if isinstance(frame, FrameBuffer):
+                    frame.release()
+
+        self._close_segment()
+        if self.dropped:
+            print(f"Frame archive dropped {self.dropped} frames")
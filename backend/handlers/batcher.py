@@ -0,0 +1,92 @@
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Condition, Thread
+
+
+class GeminiBatcher(Thread):
+    """Collects concurrent region analyses into multi-image Gemini requests and scatters the answers"""
+
+    def __init__(self, llm, max_batch=8, window=0.1, max_in_flight=4):
+        super().__init__(name="gemini_batcher", daemon=True)
+        self.llm = llm
+        self.max_batch = max_batch
+        self.window = window  # Seconds to wait for more images after the first one arrives
+        self.queue = deque()  # (arrival time, prompt, image, future, usage context)
+        self.condition = Condition()
+        self.dispatcher = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="gemini_batch")
+        self.stats = {"requests": 0, "batches": 0, "images": 0, "fallbacks": 0}
+
+    def analyze_image(self, image, prompt, context=None):
+        """Drop-in replacement for GeminiWrapper.analyze_image that shares requests with other callers"""
+        future = Future()
+        with self.condition:
+            self.queue.append((time.time(), prompt, image, future, context))
+            self.condition.notify()
+        return future.result()
+
+    def _collect(self):
+        """Wait for the batch window to close and take up to max_batch items sharing one prompt"""
+        with self.condition:
+            while not self.queue:
+                self.condition.wait()
+
+            # The window starts when the oldest waiting image arrived
+            while len(self.queue) < self.max_batch:
+                remaining = self.queue[0][0] + self.window - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(timeout=remaining)
+
+            prompt = self.queue[0][1]
+            batch = []
+            skipped = deque()
+            while self.queue and len(batch) < self.max_batch:
+                item = self.queue.popleft()
+                (batch if item[1] == prompt else skipped).append(item)
+            # Images with a different prompt keep their place for the next batch
+            self.queue.extendleft(reversed(skipped))
+
+        return prompt, batch
+
+    def _dispatch(self, prompt, batch):
+        """Send one batch and resolve each caller's future"""
+        images = [item[2] for item in batch]
+        futures = [item[3] for item in batch]
+        contexts = [item[4] for item in batch]
+
+        try:
+            if len(images) == 1:
+                results = [self.llm.analyze_image(images[0], prompt, context=contexts[0])]
+            else:
+                results = self.llm.analyze_images(images, prompt, contexts=contexts)
+
+            for image, future, context, result in zip(images, futures, contexts, results):
+                if result is None:
+                    # The batched answer left this image out; ask for it on its own
+                    with self.condition:
+                        self.stats["fallbacks"] += 1
+                    result = self.llm.analyze_image(image, prompt, context=context)
+                future.set_result(result)
+
+        except Exception as e:
+            print(f"Error dispatching Gemini batch: {e}")
+            for future in futures:
+                if not future.done():
+                    future.set_result(f"Error: {e}")
+
+    def run(self):
+        """Thread execution method"""
+        while True:
+            prompt, batch = self._collect()
+            with self.condition:
+                self.stats["requests"] += 1
+                self.stats["batches"] += len(batch) > 1
+                self.stats["images"] += len(batch)
+            print(f"Dispatching Gemini request with {len(batch)} images")
+            self.dispatcher.submit(self._dispatch, prompt, batch)
+
+    def status(self):
+        """Batching counters for the API"""
+        with self.condition:
+            return dict(self.stats, waiting=len(self.queue))
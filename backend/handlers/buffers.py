@@ -0,0 +1,70 @@
+from collections import deque
+from threading import Lock
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+class FrameBuffer:
+    """Preallocated frame array shared between capture, analysis and rendering by reference count"""
+
+    def __init__(self, pool, shape, dtype=np.uint8):
+        self.pool = pool
+        self.array = np.empty(shape, dtype=dtype)
+        self.refs = 0
+
+    def acquire(self):
+        """Take another reference before handing the buffer to a consumer"""
+        with self.pool.lock:
+            self.refs += 1
+        return self
+
+    def release(self):
+        """Drop a reference; the buffer returns to its pool when nobody holds it"""
+        with self.pool.lock:
+            self.refs -= 1
+            if self.refs == 0:
+                self.pool._recycle(self)
+
+
+class FramePool:
+    """Small pool of preallocated frame buffers so steady-state capture allocates nothing"""
+
+    def __init__(self, size=4):
+        self.size = size
+        self.free = deque()
+        self.lock = Lock()
+        self.shape = None
+        self.allocated = 0  # Buffers created so far, including ones made while the pool was exhausted
+
+    def get(self, shape):
+        """Get a free buffer of this shape, holding one reference"""
+        with self.lock:
+            if shape != self.shape:
+                # Frame size changed; stale buffers are simply dropped
+                self.shape = shape
+                self.free.clear()
+
+            buffer = self.free.pop() if self.free else None
+            if buffer is None:
+                buffer = FrameBuffer(self, shape)
+                self.allocated += 1
+            buffer.refs = 1
+            return buffer
+
+    def _recycle(self, buffer):
+        """Called with the lock held once a buffer has no references left"""
+        if buffer.array.shape == self.shape and len(self.free) < self.size:
+            self.free.append(buffer)
+
+
+def crop_to_pil(frame, x1, y1, x2, y2):
+    """RGB PIL image of a BGR frame region, converted in a single pass straight from the frame's memory"""
+    if not frame.flags['C_CONTIGUOUS']:
+        return Image.fromarray(cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2RGB))
+
+    # PIL's raw decoder reads each row of the crop directly from the parent frame using its stride
+    row_stride = frame.strides[0]
+    offset = y1 * row_stride + x1 * frame.strides[1]
+    return Image.frombuffer("RGB", (x2 - x1, y2 - y1), frame.reshape(-1)[offset:], "raw", "BGR", row_stride, 1)
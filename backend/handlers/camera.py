@@ -1,34 +1,60 @@
 import time
-import os
 import cv2
 import json
-from datetime import datetime
 from threading import Thread, Lock
 
 from handlers.analyzer import Analyzer
+from handlers.archive import FrameArchiver
+from handlers.buffers import FrameBuffer, FramePool
 from handlers.detector import YOLOTextDetector
+from handlers.overlay import OverlayLayer
+from handlers.scheduler import create_scheduler
+from settings import APP_SETTINGS
 
 
 class Camera:
     """Camera manager with YOLO detection and Gemini analysis optimized for classroom use"""
 
-    def __init__(self, llm, analyze_interval=5, headless=True, save_frames=False):
+    def __init__(self, llm, analyze_interval=5, headless=True, save_frames=False, history=None, session_id="camera"):
         self.llm = llm
+        self.history = history  # Optional HistoryStore that records every analysis
+        self.session_id = session_id
         self.analyze_interval = analyze_interval
+        self.scheduler = create_scheduler(analyze_interval)  # Adapts the interval to board activity
+        self.activity_sample_period = 0.5  # Seconds between frame-change measurements
+        self.last_activity_sample = 0
         self.last_analysis_time = 0
+        self.analysis_start_time = 0
         self.analyzing = False
+        self.analyzer = None  # Most recent analyzer thread
         self.running = True
         self.cap = None
+        self.frame_shape = None
+        # Preallocated buffers: capture frames are shared with the analyzer by reference count,
+        # display frames are handed to the archive writer the same way
+        self.frame_pool = FramePool(APP_SETTINGS["frame_pool_size"])
+        self.display_pool = FramePool(APP_SETTINGS["archive_queue_size"] + 1)
         self.results = []
+        self.results_version = 0  # Incremented whenever results change
+        self.overlay = OverlayLayer()  # Cached rendering of the current results
         self.headless = True  # Force headless mode to avoid display issues on macOS
         self.save_frames = save_frames
         self.frame_dir = "captured_frames"
         self.frame_lock = Lock()  # Thread safety for frame processing
         self.results_lock = Lock()  # Additional lock for results
 
-        # Create frames directory if saving is enabled
-        if self.save_frames and not os.path.exists(self.frame_dir):
-            os.makedirs(self.frame_dir)
+        # Archive frames into video segments on a background thread so disk I/O never stalls capture
+        self.archiver = None
+        if self.save_frames:
+            self.archiver = FrameArchiver(
+                self.frame_dir,
+                fps=APP_SETTINGS["archive_fps"],
+                segment_seconds=APP_SETTINGS["archive_segment_seconds"],
+                max_bytes=APP_SETTINGS["archive_max_bytes"],
+                max_age=APP_SETTINGS["archive_max_age"],
+                queue_size=APP_SETTINGS["archive_queue_size"]
+            )
+            self.archiver.start()
 
         # Use YOLOv8n (nano) model for maximum efficiency
         self.detector = YOLOTextDetector("yolov8n")
@@ -45,28 +71,39 @@ class Camera:
             width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
             height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
             fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self.frame_shape = (height, width, 3)
             print(f"Camera activated: {width}x{height} @ {fps}fps")
             return True
         except Exception as e:
             print(f"Camera error: {e}")
             return False
 
-    def analyze_frame(self, frame):
-        """Start a new analysis thread for the current frame"""
+    def analyze_frame(self, frame_buffer):
+        """Start a new analysis thread for the current frame buffer, which the analyzer releases when done"""
         self.analyzing = True
+        self.analysis_start_time = time.time()
         print("Starting frame analysis...")
         # Create and configure a new analyzer thread
         analyzer = Analyzer("analyzer_thread")
-        analyzer.setup(frame, self.llm, self.detector, self.on_analysis_complete)
+        analyzer.setup(frame_buffer.array, self.llm, self.detector, self.on_analysis_complete,
+                       frame_buffer=frame_buffer)
+        self.analyzer = analyzer
         analyzer.start()
 
     def on_analysis_complete(self, results):
         """Callback when analysis finishes"""
         with self.results_lock:
             self.results = results
+            self.results_version += 1
             self.analyzing = False
             self.last_analysis_time = time.time()
 
+        # Pace by Gemini latency, not the whole detection + analysis time
+        self.scheduler.record_analysis(self.analyzer.gemini_latency)
+        if self.history is not None and results:
+            self.history.record(self.session_id, results, timestamp=self.analysis_start_time)
+        self.analyze_interval = self.scheduler.current_interval()
+
         if results:
             print(f"Analysis complete: {len(results)} objects detected")
             for idx, result in enumerate(results):
@@ -74,46 +111,22 @@ class Camera:
         else:
             print("Analysis complete: No objects detected")
 
-    def process_frame_for_display(self, frame):
-        """Process a frame with current analysis results for display"""
+    def process_frame_for_display(self, frame, out=None):
+        """Process a frame with current analysis results for display, rendering into `out` if given"""
         if frame is None:
             return None
 
-        display_frame = frame.copy()
-
-        # Apply results to the frame - always show the latest results
+        # Take a snapshot of the latest results; the overlay is only re-rasterized when they change
         with self.results_lock:
-            current_results = self.results.copy() if self.results else []
-
-        # Draw each result on the frame
-        for det in current_results:
-            if 'box' in det and 'label' in det:
-                box = det['box']
-                label = det['label']
-
-                # Draw rectangle
-                cv2.rectangle(
-                    display_frame,
-                    (int(box[0]), int(box[1])),
-                    (int(box[2]), int(box[3])),
-                    (0, 255, 0),  # Green color in BGR
-                    2  # Line thickness
-                )
-
-                # Draw label
-                cv2.putText(
-                    display_frame,
-                    label,
-                    (int(box[0]), int(box[1]) - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (0, 255, 0),
-                    2
-                )
+            current_results = self.results
+            results_version = self.results_version
+
+        display_frame = self.overlay.composite(frame, current_results, results_version, out=out)
+        if display_frame is frame:
+            display_frame = frame.copy()
 
         # Add status info
-        current_time = time.time()
-        status = "Analyzing..." if self.analyzing else f"Next analysis in {int(self.analyze_interval - (current_time - self.last_analysis_time))}s"
+        status = "Analyzing..." if self.analyzing else f"Next analysis in {int(self.scheduler.time_until_next())}s"
         cv2.putText(
             display_frame,
             status,
@@ -127,22 +140,15 @@ class Camera:
         return display_frame
 
     def save_frame_with_detections(self, frame):
-        """Save the current frame with detections to a file if saving is enabled"""
-        if not self.save_frames:
-            return None
+        """Queue the current frame with detections for the background archive writer"""
+        if not self.save_frames or self.archiver is None:
+            return False
 
-        try:
-            # Create a unique filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{self.frame_dir}/frame_{timestamp}.jpg"
-
-            # Save the frame
-            cv2.imwrite(filename, frame)
-            print(f"Frame saved: {filename}")
-            return filename
-        except Exception as e:
-            print(f"Error saving frame: {e}")
-            return None
+        # Pooled buffers are handed off as-is and released by the archiver once written;
+        # plain arrays are copied so the archive never sees later drawing on them
+        if isinstance(frame, FrameBuffer):
+            return self.archiver.submit(frame)
+        return self.archiver.submit(frame.copy())
 
     def stream(self):
         """Main camera loop - captures frames and handles analysis timing"""
@@ -152,23 +158,45 @@ class Camera:
 
         while self.running:
             try:
-                # Capture a frame from the camera
-                ret, frame = self.cap.read()
+                # Capture a frame from the camera straight into a preallocated buffer
+                frame_buffer = self.frame_pool.get(self.frame_shape)
+                ret, frame = self.cap.read(image=frame_buffer.array)
                 if not ret:
+                    frame_buffer.release()
                     print("Failed to capture frame, retrying...")
                     time.sleep(0.5)
                     continue
 
-                # Check if it's time for a new analysis
+                if frame is not frame_buffer.array:
+                    # The camera delivered a different size; resize the pool and keep using buffers
+                    print(f"Camera frame size changed to {frame.shape[1]}x{frame.shape[0]}")
+                    self.frame_shape = frame.shape
+                    frame_buffer.release()
+                    frame_buffer = self.frame_pool.get(self.frame_shape)
+                    frame_buffer.array[:] = frame
+                    frame = frame_buffer.array
+
+                # Periodically measure board activity to adapt the analysis interval
                 current_time = time.time()
-                if (current_time - self.last_analysis_time >= self.analyze_interval) and not self.analyzing:
+                if current_time - self.last_activity_sample >= self.activity_sample_period:
+                    self.scheduler.observe(frame)
+                    self.last_activity_sample = current_time
+
+                # Check if it's time for a new analysis
+                if self.scheduler.is_due(current_time) and not self.analyzing:
                     print(f"Time for analysis: {current_time - self.last_analysis_time:.2f}s elapsed")
-                    self.analyze_frame(frame.copy())
+                    # Share the buffer with the analyzer instead of copying the frame
+                    self.analyze_frame(frame_buffer.acquire())
+
+                # Compose a frame for saving only when the archiver will keep it at its frame rate
+                if (self.save_frames and self.results and current_time - self.last_analysis_time < 2 and
+                        self.archiver is not None and self.archiver.due(current_time)):
+                    display_buffer = self.display_pool.get(frame.shape)
+                    self.process_frame_for_display(frame, out=display_buffer.array)
+                    self.save_frame_with_detections(display_buffer)
 
-                # Process frame for display or saving
-                if self.save_frames and self.results and (current_time - self.last_analysis_time < 2):
-                    display_frame = self.process_frame_for_display(frame)
-                    self.save_frame_with_detections(display_frame)
+                # Done with this frame; the buffer returns to the pool once the analyzer releases it too
+                frame_buffer.release()
 
                 # In headless mode, just process frames without displaying
                 time.sleep(0.01)  # Brief sleep to prevent CPU overload
@@ -180,4 +208,8 @@ class Camera:
         # Clean up resources
         if self.cap is not None:
             self.cap.release()
-            print("Camera resources released")
\ No newline at end of file
+            print("Camera resources released")
+
+        if self.archiver is not None:
+            self.archiver.stop()
+            print("Frame archive closed")
\ No newline at end of file
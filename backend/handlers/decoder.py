@@ -0,0 +1,86 @@
+import io
+from threading import Lock
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Reduced decode modes supported by OpenCV, largest reduction first
+REDUCED_MODES = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+    (1, cv2.IMREAD_COLOR),
+]
+
+
+class DecodedFrame:
+    """Uploaded image decoded at reduced resolution, with full-resolution pixels decoded only on demand"""
+
+    def __init__(self, data, preview, width, height):
+        self.data = data
+        self.preview = preview  # Reduced BGR image for detection and scene-change checks
+        self.width = width  # Full-resolution size
+        self.height = height
+        self.scale = width / preview.shape[1]  # Full-resolution pixels per preview pixel
+        self._full = None
+        self._full_lock = Lock()  # Concurrent region crops share one full decode
+
+    def _full_image(self):
+        """Decode the full-resolution image once, straight to RGB for Gemini"""
+        with self._full_lock:
+            if self._full is None:
+                self._full = Image.open(io.BytesIO(self.data)).convert("RGB")
+            return self._full
+
+    def to_full_box(self, box):
+        """Convert a preview-space [x1, y1, x2, y2] box to clamped full-resolution coordinates"""
+        x1, y1, x2, y2 = (int(round(v * self.scale)) for v in box)
+        return max(0, x1), max(0, y1), min(self.width, x2), min(self.height, y2)
+
+    def crop(self, box):
+        """Full-resolution RGB crop of a preview-space box, or None if the box is empty"""
+        x1, y1, x2, y2 = self.to_full_box(box)
+        if x2 <= x1 or y2 <= y1:
+            return None
+        if (x1, y1, x2, y2) == (0, 0, self.width, self.height):
+            return self._full_image()
+        return self._full_image().crop((x1, y1, x2, y2))
+
+    def full(self):
+        """Full-resolution RGB image"""
+        return self._full_image()
+
+    def release(self):
+        """Drop the full-resolution pixels once all crops have been taken"""
+        with self._full_lock:
+            self._full = None
+
+
+def decode_frame(data, detect_max_edge=640):
+    """Decode image bytes at the smallest resolution that still satisfies the detector, or None"""
+    nparr = np.frombuffer(data, np.uint8)
+
+    # Read only the header to learn the full size without decoding pixels
+    try:
+        width, height = Image.open(io.BytesIO(data)).size
+    except Exception:
+        width = height = None
+
+    flags = cv2.IMREAD_COLOR
+    if width and height:
+        long_edge = max(width, height)
+        for factor, mode in REDUCED_MODES:
+            if long_edge / factor >= detect_max_edge or factor == 1:
+                flags = mode
+                break
+
+    # Ignore EXIF orientation so preview and full-resolution pixels share one coordinate space
+    preview = cv2.imdecode(nparr, flags | cv2.IMREAD_IGNORE_ORIENTATION)
+    if preview is None:
+        return None
+
+    if not (width and height):
+        height, width = preview.shape[:2]
+
+    return DecodedFrame(data, preview, width, height)
@@ -1,3 +1,5 @@
+import threading
+
 import cv2
 from ultralytics import YOLO
 
@@ -5,8 +7,10 @@ from ultralytics import YOLO
 class YOLOTextDetector:
     """Text detection using standard YOLO model for efficiency"""
 
-    def __init__(self, model_name="yolov8n"):
+    def __init__(self, model_name="yolov8n", input_size=640):
         """Initialize with a standard YOLO model"""
+        self.input_size = input_size  # YOLO resizes every frame to this size before inference
+        self.lock = threading.Lock()  # YOLO predictors are not safe to call from several threads at once
         try:
             # Use the standard YOLOv8 nano model (smallest and fastest)
             self.model = YOLO(model_name)
@@ -22,7 +26,8 @@ class YOLOTextDetector:
 
         try:
             # Run YOLO detection on the frame
-            results = self.model(frame, conf=0.3)  # Slightly higher confidence threshold
+            with self.lock:
+                results = self.model(frame, conf=0.3, imgsz=self.input_size)  # Slightly higher confidence threshold
 
             # Classes that might contain text or are of interest
             text_related_classes = [
@@ -0,0 +1,63 @@
+import math
+import random
+import time
+from types import SimpleNamespace
+
+
+def _image_tokens(size):
+    """Approximate Gemini image tokens: 258 for small images, otherwise 258 per 768px tile"""
+    width, height = size
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+class FakeGeminiWrapper:
+    """Local stand-in for GeminiWrapper with configurable latency and error rate, used for load testing"""
+
+    def __init__(self, latency=1.0, jitter=0.25, error_rate=0.0, seed=None, usage=None):
+        self.model_name = "fake-gemini"
+        self.max_image_size = (2048, 2048)
+        self.latency = latency  # Mean seconds per request
+        self.jitter = jitter  # Fraction of latency added or removed at random
+        self.error_rate = error_rate  # Probability (0-1) that a request fails
+        self.usage = usage  # Optional UsageTracker, fed with approximate token counts
+        self.random = random.Random(seed)
+        print(f"Initialized fake Gemini: latency={latency}s, jitter={jitter}, error_rate={error_rate}")
+
+    def _simulate(self):
+        """Sleep like a network call and decide whether it fails"""
+        delay = self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))
+        time.sleep(max(0.0, delay))
+        return self.random.random() < self.error_rate
+
+    def _record(self, images, prompt, texts, elapsed, contexts):
+        """Report token counts shaped like a real response's usage metadata"""
+        if self.usage is None:
+            return
+        response = SimpleNamespace(usage_metadata=SimpleNamespace(
+            prompt_token_count=len(prompt) // 4 + sum(_image_tokens(image.size) for image in images),
+            candidates_token_count=sum(len(text) // 4 for text in texts)
+        ))
+        self.usage.record_response(response, elapsed, images, contexts)
+
+    def analyze_image(self, image, prompt, retry_count=0, context=None):
+        """Return a canned analysis after a simulated delay"""
+        start_time = time.time()
+        if self._simulate():
+            return "Error: Simulated Gemini failure"
+        width, height = image.size
+        text = (f"This {width}x{height} region shows a math equation. "
+                "Fake analysis generated for load testing.")
+        self._record([image], prompt, [text], time.time() - start_time, [context])
+        return text
+
+    def analyze_images(self, images, prompt, retry_count=0, contexts=None):
+        """Return one canned analysis per image after a single simulated delay"""
+        start_time = time.time()
+        if self._simulate():
+            return ["Error: Simulated Gemini failure"] * len(images)
+        texts = [f"This {image.size[0]}x{image.size[1]} region shows a math equation. "
+                 "Fake analysis generated for load testing." for image in images]
+        self._record(images, prompt, texts, time.time() - start_time, contexts or [None] * len(images))
+        return texts
@@ -0,0 +1,120 @@
+import time
+from collections import deque
+from threading import Condition, Event, Thread
+
+
+class FrameTicket:
+    """A queued frame and the outcome its submitter is waiting for"""
+
+    def __init__(self, session_id, data, deadline, endpoint=None):
+        self.session_id = session_id
+        self.endpoint = endpoint  # Where the frame came from, for usage accounting
+        self.data = data
+        self.received = time.time()
+        self.deadline = self.received + deadline
+        self.event = Event()
+        self.status = "queued"  # queued -> processing -> done | superseded | expired | error
+        self.result = None
+        self.error = None
+
+
+class FrameQueue:
+    """Per-client latest-wins frame queue with deadline-based shedding and round-robin fairness"""
+
+    def __init__(self, process, workers=1):
+        self.process = process  # Called as process(session_id, data, received_time, endpoint) -> result payload
+        self.pending = {}  # Newest unprocessed ticket per session
+        self.ready = deque()  # Sessions with a pending frame, in service order
+        self.condition = Condition()
+        self.processing = 0
+        self.stats = {"processed": 0, "superseded": 0, "expired": 0, "errors": 0}
+        self.workers = [
+            Thread(target=self._worker, name=f"frame_worker_{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def _finish(self, ticket, status, result=None, error=None):
+        ticket.status = status
+        ticket.result = result
+        ticket.error = error
+        ticket.data = None  # Release the frame bytes as soon as the outcome is known
+        ticket.event.set()
+
+    def submit(self, session_id, data, deadline, endpoint=None):
+        """Queue a frame, replacing any older frame from the same session that has not started yet"""
+        ticket = FrameTicket(session_id, data, deadline, endpoint)
+
+        with self.condition:
+            previous = self.pending.get(session_id)
+            if previous is not None:
+                # Latest wins: the session keeps its place in line, the older frame is dropped
+                self.stats["superseded"] += 1
+                self._finish(previous, "superseded")
+            else:
+                self.ready.append(session_id)
+            self.pending[session_id] = ticket
+            self.condition.notify()
+
+        return ticket
+
+    def wait(self, ticket, timeout=300):
+        """Block until the ticket has an outcome, expiring it if its deadline passes while still queued"""
+        remaining = ticket.deadline - time.time()
+        if remaining > 0 and ticket.event.wait(timeout=remaining):
+            return ticket
+
+        with self.condition:
+            if ticket.status == "queued" and self.pending.get(ticket.session_id) is ticket:
+                del self.pending[ticket.session_id]
+                self.ready.remove(ticket.session_id)
+                self.stats["expired"] += 1
+                self._finish(ticket, "expired")
+
+        # Already being processed (or finished); wait for it to complete
+        ticket.event.wait(timeout=timeout)
+        return ticket
+
+    def _next_ticket(self):
+        """Take the next session's frame in round-robin order, shedding frames past their deadline"""
+        with self.condition:
+            while True:
+                while not self.ready:
+                    self.condition.wait()
+
+                session_id = self.ready.popleft()
+                ticket = self.pending.pop(session_id)
+
+                if time.time() > ticket.deadline:
+                    self.stats["expired"] += 1
+                    self._finish(ticket, "expired")
+                    continue
+
+                ticket.status = "processing"
+                self.processing += 1
+                return ticket
+
+    def _worker(self):
+        while True:
+            ticket = self._next_ticket()
+            try:
+                result = self.process(ticket.session_id, ticket.data, ticket.received, ticket.endpoint)
+                with self.condition:
+                    self.stats["processed"] += 1
+                self._finish(ticket, "done", result=result)
+            except Exception as e:
+                print(f"Error processing frame for {ticket.session_id}: {e}")
+                with self.condition:
+                    self.stats["errors"] += 1
+                self._finish(ticket, "error", error=e)
+            finally:
+                with self.condition:
+                    self.processing -= 1
+
+    def status(self):
+        """Queue depth and drop counters for the API"""
+        with self.condition:
+            return dict(self.stats, queued=len(self.pending), processing=self.processing)
@@ -0,0 +1,163 @@
+import json
+import sqlite3
+import time
+from collections import deque
+from threading import Condition, Thread
+
+
+class HistoryStore(Thread):
+    """Persistent, full-text indexed store of analysis results with batched background writes"""
+
+    def __init__(self, path, batch_size=50, flush_interval=1.0, max_pending=10000):
+        super().__init__(name="history_thread", daemon=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # Max seconds a record waits before being written
+        self.pending = deque(maxlen=max_pending)
+        self.condition = Condition()
+        self.running = True
+
+        self._create_schema()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")  # Readers never block the writer
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _create_schema(self):
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY,
+                    session TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    region_index INTEGER,
+                    title TEXT,
+                    box TEXT,
+                    full_text TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_analyses_session_time ON analyses (session, timestamp);
+                CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+                    full_text, content='analyses', content_rowid='id'
+                );
+            """)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def record(self, session, results, timestamp=None):
+        """Queue analysis results for writing; never blocks on disk"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.condition:
+            for idx, result in enumerate(results or []):
+                full_text = result.get('full_text')
+                if not full_text:
+                    continue
+                box = result.get('boundingBox', result.get('box'))
+                self.pending.append((
+                    session,
+                    timestamp,
+                    result.get('region_index', idx),
+                    result.get('title', result.get('label')),
+                    json.dumps(box),
+                    full_text
+                ))
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify()
+
+    def stop(self):
+        """Flush pending records and stop the writer thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.join()
+
+    def _write_batch(self, conn, batch):
+        """Insert a batch of records and their full-text index entries in one transaction"""
+        with conn:
+            for row in batch:
+                cursor = conn.execute(
+                    "INSERT INTO analyses (session, timestamp, region_index, title, box, full_text) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    row
+                )
+                conn.execute(
+                    "INSERT INTO analyses_fts (rowid, full_text) VALUES (?, ?)",
+                    (cursor.lastrowid, row[5])
+                )
+
+    def run(self):
+        """Thread execution method"""
+        conn = self._connect()
+        try:
+            while True:
+                with self.condition:
+                    if self.running and len(self.pending) < self.batch_size:
+                        self.condition.wait(timeout=self.flush_interval)
+                    batch = list(self.pending)
+                    self.pending.clear()
+                    running = self.running
+
+                if batch:
+                    try:
+                        self._write_batch(conn, batch)
+                    except Exception as e:
+                        print(f"Error writing {len(batch)} history records: {e}")
+
+                if not running:
+                    break
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _match_expression(query):
+        """Quote each search term so user input cannot break FTS5 query syntax"""
+        terms = [term.replace('"', '""') for term in query.split()]
+        return " ".join(f'"{term}"' for term in terms if term)
+
+    def search(self, query, session=None, page=1, per_page=20):
+        """Full-text search across past analyses, best matches first"""
+        match = self._match_expression(query)
+        if not match:
+            return {"total": 0, "page": page, "per_page": per_page, "results": []}
+
+        where = "analyses_fts MATCH ?"
+        params = [match]
+        if session:
+            where += " AND a.session = ?"
+            params.append(session)
+
+        conn = self._connect()
+        try:
+            total = conn.execute(
+                f"SELECT COUNT(*) FROM analyses_fts JOIN analyses a ON a.id = analyses_fts.rowid WHERE {where}",
+                params
+            ).fetchone()[0]
+
+            rows = conn.execute(
+                "SELECT a.id, a.session, a.timestamp, a.region_index, a.title, a.box, a.full_text, "
+                "snippet(analyses_fts, 0, '**', '**', '...', 16) "
+                f"FROM analyses_fts JOIN analyses a ON a.id = analyses_fts.rowid WHERE {where} "
+                "ORDER BY rank LIMIT ? OFFSET ?",
+                params + [per_page, (page - 1) * per_page]
+            ).fetchall()
+        finally:
+            conn.close()
+
+        return {
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "results": [{
+                "id": row[0],
+                "session": row[1],
+                "timestamp": row[2],
+                "region_index": row[3],
+                "title": row[4],
+                "box": json.loads(row[5]) if row[5] else None,
+                "full_text": row[6],
+                "snippet": row[7]
+            } for row in rows]
+        }
@@ -1,18 +1,38 @@
 import io
+import json
 import time
+from typing import TypedDict
 
 import google.generativeai as genai
 from PIL import Image
 
+# Wraps the per-image prompt when several images share one request
+BATCH_PROMPT = """
+You will receive {count} images, each preceded by its label "Image <index>:" (indices 0 to {last}).
+Analyze every image independently using these instructions:
+
+{prompt}
+
+Respond with a JSON array containing exactly one object per image, with the image "index"
+and its "analysis" as the text you would have written for that image alone.
+"""
+
+
+class RegionAnalysis(TypedDict):
+    """Structured per-image answer in a batched response"""
+    index: int
+    analysis: str
+
 
 class GeminiWrapper:
     """Enhanced wrapper for the Gemini vision API with retry logic and image optimization"""
 
-    def __init__(self, api_key, model="gemini-2.0-flash", max_retries=2):
+    def __init__(self, api_key, model="gemini-2.0-flash", max_retries=2, usage=None):
         # Initialize the Gemini client with API key
         genai.configure(api_key=api_key)
         self.model_name = model
         self.max_retries = max_retries
+        self.usage = usage  # Optional UsageTracker that receives token counts per call
         self.max_image_size = (2048, 2048)  # Maximum recommended size for Gemini
         print(f"Initialized Gemini wrapper with model: {model}")
 
@@ -56,8 +76,8 @@ class GeminiWrapper:
             print(f"Error optimizing image: {e}")
             return image  # Return original image if optimization fails
 
-    def analyze_image(self, image, prompt, retry_count=0):
-        """Send image to Gemini API and get text response with retry logic"""
+    def analyze_image(self, image, prompt, retry_count=0, context=None):
+        """Send image to Gemini API and get text response with retry logic (context attributes token usage)"""
         try:
             print(f"Creating Gemini model instance: {self.model_name}")
             # Create a generative model instance
@@ -74,6 +94,8 @@ class GeminiWrapper:
             )
             elapsed = time.time() - start_time
             print(f"Received response from Gemini API in {elapsed:.2f} seconds")
+            if self.usage is not None:
+                self.usage.record_response(response, elapsed, [optimized_image], [context])
 
             if hasattr(response, 'text'):
                 return response.text
@@ -90,6 +112,51 @@ class GeminiWrapper:
                 wait_time = 2 ** retry_count  # Exponential backoff
                 print(f"Retrying ({retry_count}/{self.max_retries}) in {wait_time} seconds...")
                 time.sleep(wait_time)
-                return self.analyze_image(image, prompt, retry_count)
+                return self.analyze_image(image, prompt, retry_count, context)
+
+            return f"Error: {e}"
+
+    def analyze_images(self, images, prompt, retry_count=0, contexts=None):
+        """Send several images in one request and get one text response per image (None if missing)"""
+        try:
+            model = genai.GenerativeModel(self.model_name)
+
+            contents = [BATCH_PROMPT.format(count=len(images), last=len(images) - 1, prompt=prompt)]
+            optimized_images = [self._optimize_image(image) for image in images]
+            for idx, image in enumerate(optimized_images):
+                contents.append(f"Image {idx}:")
+                contents.append(image)
+
+            print(f"Sending batch of {len(images)} images to Gemini API...")
+            start_time = time.time()
+            response = model.generate_content(
+                contents=contents,
+                generation_config=genai.GenerationConfig(
+                    response_mime_type="application/json",
+                    response_schema=list[RegionAnalysis]
+                )
+            )
+            elapsed = time.time() - start_time
+            print(f"Received batch response from Gemini API in {elapsed:.2f} seconds")
+            if self.usage is not None:
+                self.usage.record_response(response, elapsed, optimized_images, contexts or [None] * len(images))
+
+            # Scatter the structured answers back to their images
+            results = [None] * len(images)
+            for answer in json.loads(response.text):
+                idx = answer.get("index")
+                if isinstance(idx, int) and 0 <= idx < len(images) and answer.get("analysis"):
+                    results[idx] = answer["analysis"]
+            return results
+
+        except Exception as e:
+            print(f"Gemini API batch error: {e}")
+
+            if retry_count < self.max_retries:
+                retry_count += 1
+                wait_time = 2 ** retry_count  # Exponential backoff
+                print(f"Retrying batch ({retry_count}/{self.max_retries}) in {wait_time} seconds...")
+                time.sleep(wait_time)
+                return self.analyze_images(images, prompt, retry_count, contexts)
 
-            return f"Error: {e}"
\ No newline at end of file
+            return [f"Error: {e}"] * len(images)
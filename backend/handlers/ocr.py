@@ -1,75 +1,124 @@
-import time
+import re
+from threading import Lock
 
 import cv2
+import numpy as np
 
-from backend.handlers.analyzer import Analyzer
-from backend.settings import DEFAULT_PROMPT
+# Characters that suggest equations; these regions are better explained by Gemini
+MATH_PATTERN = re.compile(r"[=+^√∑∫π≤≥±×÷<>∞∂∆λθ]|\d\s*[*/]\s*\d|\b[a-z]\s*\(\s*[a-z]\s*\)")
 
 
-class Camera:
-    def __init__(self, gemini, display, analyze_interval=30):
-        self.gemini = gemini
-        self.height = None
-        self.width = None
-        self.cap = None
-        self.analyzing = False
-        self.analyze_interval = analyze_interval  # Time in seconds between automatic analyses
-        self.last_analysis_time = 0
-        self.prompt = DEFAULT_PROMPT
-        self.running = True
-        self.display = display
+class LocalOCR:
+    """In-process CPU text extraction that answers plain-text regions without a Gemini round trip"""
+
+    def __init__(self, min_confidence=0.85, max_words=40, max_lines=6, diagram_edge_ratio=0.04):
+        self.min_confidence = min_confidence  # Mean recognition score required to answer locally
+        self.max_words = max_words  # Longer passages are escalated for a proper explanation
+        self.max_lines = max_lines
+        self.diagram_edge_ratio = diagram_edge_ratio  # Share of edge pixels outside text that marks a diagram
+        self.lock = Lock()
+        self.stats = {"regions": 0, "answered": 0, "escalated": 0}
 
-    def activate(self):
         try:
-            self.cap = cv2.VideoCapture(0)
-            if not self.cap.isOpened():
-                raise Exception("Failed to open camera")
-
-            # Update camera properties
-            self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            return True
+            # ONNX models run on CPU in-process and work with the opencv-python build we already use
+            from rapidocr_onnxruntime import RapidOCR
+            self.engine = RapidOCR()
+            print("Local OCR engine loaded")
         except Exception as e:
-            print(f"Camera error: {e}")
-            return False
-
-    def analyze_frame(self, frame):
-        """Start a new thread to analyze the frame"""
-        # Create and start a new analyzer thread
-        analyzer = Analyzer("analyzer_thread")
-        analyzer.setup(frame, self.gemini, self.prompt, self.on_analysis_complete)
-        analyzer.start()
-
-    def on_analysis_complete(self, results):
-        """Callback for when analysis is complete"""
-        self.display.update_results(results)
-        self.analyzing = False
-
-    def stream(self):
-        """Main loop for camera streaming and periodic analysis"""
-        if not self.activate():
-            return
-
-        while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
-                time.sleep(0.1)
-                continue
-
-            # Check if it's time for automatic analysis
-            current_time = time.time()
-            if (current_time - self.last_analysis_time >= self.analyze_interval) and not self.analyzing:
-                self.analyze_frame(frame)
-
-            # Display frame with overlay
-            display_frame = self.display.overlay_on_frame(frame)
-            cv2.imshow('Camera Feed', display_frame)
-
-            # Check for exit command (ESC key)
-            key = cv2.waitKey(1) & 0xFF
-            if key == 27:  # ESC key
-                self.running = False
-
-        # Release resources
-        self.cap.release()
-        cv2.destroyAllWindows()
+            print(f"Local OCR unavailable, every region will go to Gemini: {e}")
+            self.engine = None
+
+    def read(self, image):
+        """Recognize text in a PIL RGB image; returns (box, text, score) for each detected line"""
+        if self.engine is None:
+            return []
+
+        # RapidOCR expects OpenCV's BGR channel order
+        bgr = np.ascontiguousarray(np.asarray(image)[:, :, ::-1])
+        result, _ = self.engine(bgr)
+        if not result:
+            return []
+
+        lines = [(np.array(box, dtype=np.float32), text.strip(), float(score)) for box, text, score in result]
+        return [line for line in lines if line[1]]
+
+    @staticmethod
+    def _rows(lines):
+        """Group recognized boxes into reading-order rows of text"""
+        rows = []
+        for box, text, _ in sorted(lines, key=lambda line: line[0][:, 1].mean()):
+            center = box[:, 1].mean()
+            height = box[:, 1].max() - box[:, 1].min()
+            # Boxes whose vertical centers are within half a line height share a row
+            if rows and abs(center - rows[-1][0]) < height / 2:
+                rows[-1][1].append((box[:, 0].min(), text))
+            else:
+                rows.append((center, [(box[:, 0].min(), text)]))
+        return [" ".join(text for _, text in sorted(words)) for _, words in rows]
+
+    def _diagram_score(self, image, lines):
+        """Fraction of edge pixels that fall outside recognized text, a cheap proxy for drawings"""
+        gray = cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2GRAY)
+        edges = cv2.Canny(gray, 50, 150)
+
+        text_mask = np.zeros_like(edges)
+        for box, _, _ in lines:
+            cv2.fillPoly(text_mask, [box.astype(np.int32)], 255)
+
+        outside = np.count_nonzero(edges[text_mask == 0])
+        return outside / edges.size
+
+    def escalation_reason(self, image, lines):
+        """Why a region needs Gemini, or None if the local text is a good enough answer"""
+        if self.engine is None:
+            return "engine unavailable"
+        if not lines:
+            return "no text found"
+
+        text = " ".join(line[1] for line in lines)
+        confidence = sum(line[2] * len(line[1]) for line in lines) / max(1, sum(len(line[1]) for line in lines))
+
+        if confidence < self.min_confidence:
+            return f"low confidence ({confidence:.2f})"
+        if len(lines) > self.max_lines or len(text.split()) > self.max_words:
+            return "too much text"
+        if MATH_PATTERN.search(text.lower()):
+            return "equation"
+        if sum(c.isdigit() for c in text) > 0.3 * len(text):
+            return "mostly numbers"
+        if self._diagram_score(image, lines) > self.diagram_edge_ratio:
+            return "diagram"
+        return None
+
+    def try_answer(self, image):
+        """Return a markdown answer for simple printed text, or None to escalate to Gemini"""
+        if self.engine is None:
+            # Fast path is off; leave the counters alone so the escalation rate isn't reported as 100%
+            return None
+
+        try:
+            lines = self.read(image)
+            reason = self.escalation_reason(image, lines)
+        except Exception as e:
+            print(f"Local OCR error: {e}")
+            reason = "error"
+
+        with self.lock:
+            self.stats["regions"] += 1
+            self.stats["escalated" if reason else "answered"] += 1
+
+        if reason:
+            print(f"Escalating region to Gemini: {reason}")
+            return None
+
+        rows = self._rows(lines)
+        print(f"Answered region locally: {len(rows)} lines of text")
+        return "**Text on the board:**\n\n" + "\n".join(f"> {row}" for row in rows)
+
+    def status(self):
+        """Fast-path counters and escalation rate for the API"""
+        with self.lock:
+            stats = dict(self.stats)
+        stats["enabled"] = self.engine is not None
+        stats["escalation_rate"] = stats["escalated"] / stats["regions"] if stats["regions"] else None
+        return stats
@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+
+class OverlayLayer:
+    """Rasterizes detection boxes and labels once and composites them onto frames"""
+
+    def __init__(self, color=(0, 255, 0), thickness=2, font_scale=0.5):
+        self.color = color  # BGR
+        self.thickness = thickness
+        self.font_scale = font_scale
+        # Cached layer as (version, shape, bgra, mask, roi) so it can be swapped atomically
+        self.cache = None
+
+    def _rasterize(self, results, shape):
+        """Draw every result into a transparent BGRA layer"""
+        height, width = shape[:2]
+        layer = np.zeros((height, width, 4), dtype=np.uint8)
+        color = self.color + (255,)
+
+        for result in results:
+            if not isinstance(result, dict) or 'label' not in result or 'box' not in result:
+                continue
+            box = result['box']  # [x1, y1, x2, y2]
+
+            cv2.rectangle(
+                layer,
+                (int(box[0]), int(box[1])),
+                (int(box[2]), int(box[3])),
+                color,
+                self.thickness
+            )
+            cv2.putText(
+                layer,
+                result['label'],
+                (int(box[0]), int(box[1]) - 10),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                self.font_scale,
+                color,
+                self.thickness
+            )
+
+        mask = layer[:, :, 3] > 0
+
+        # Limit compositing to the bounding rectangle of drawn pixels
+        ys, xs = np.nonzero(mask)
+        if len(ys) == 0:
+            roi = None
+        else:
+            roi = (ys.min(), ys.max() + 1, xs.min(), xs.max() + 1)
+
+        return layer, mask, roi
+
+    def get(self, results, version, shape):
+        """Return the cached layer for this results version, rebuilding it if stale"""
+        cache = self.cache
+        if cache is None or cache[0] != version or cache[1] != shape[:2]:
+            layer, mask, roi = self._rasterize(results, shape)
+            cache = (version, shape[:2], layer, mask, roi)
+            self.cache = cache
+        return cache
+
+    def composite(self, frame, results, version, out=None):
+        """Blend the cached overlay onto a copy of the frame, written into `out` when it is provided"""
+        if frame is None:
+            return frame
+
+        roi = None
+        if results:
+            _, _, layer, mask, roi = self.get(results, version, frame.shape)
+
+        if out is not None:
+            np.copyto(out, frame)
+            result_frame = out
+        elif roi is None:
+            return frame
+        else:
+            result_frame = frame.copy()
+
+        if roi is not None:
+            y1, y2, x1, x2 = roi
+            np.copyto(
+                result_frame[y1:y2, x1:x2],
+                layer[y1:y2, x1:x2, :3],
+                where=mask[y1:y2, x1:x2, None]
+            )
+        return result_frame
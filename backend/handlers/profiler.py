@@ -0,0 +1,117 @@
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Time-boxed wall-clock sampler of every thread's stack, exported as folded stacks for flamegraphs"""
+
+    def __init__(self, max_duration=60, max_rate=1000):
+        self.max_duration = max_duration
+        self.max_rate = max_rate
+        self.lock = threading.Lock()  # Only one profile runs at a time
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    def _stack(self, frame):
+        """Folded representation of a stack, outermost call first"""
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame))
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def profile(self, duration=10, rate=100):
+        """Sample all threads for `duration` seconds; returns folded stacks text, or None if busy"""
+        duration = min(max(0.1, duration), self.max_duration)
+        rate = min(max(1, rate), self.max_rate)
+        interval = 1.0 / rate
+
+        if not self.lock.acquire(blocking=False):
+            return None
+
+        try:
+            me = threading.get_ident()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            counts = Counter()
+            samples = 0
+
+            end = time.time() + duration
+            while time.time() < end:
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    thread = names.get(ident)
+                    if thread is None:
+                        names = {t.ident: t.name for t in threading.enumerate()}
+                        thread = names.get(ident, str(ident))
+                    counts[f"{thread};{self._stack(frame)}"] += 1
+                samples += 1
+                time.sleep(interval)
+
+            print(f"CPU profile collected {samples} samples over {duration:.1f}s")
+            return "\n".join(f"{stack} {count}" for stack, count in counts.most_common()) + "\n"
+        finally:
+            self.lock.release()
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots with a diff against the previous snapshot to find growing allocators"""
+
+    def __init__(self, frames=15):
+        self.frames = frames
+        self.previous = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        with self.lock:
+            self.previous = None
+
+    def stop(self):
+        with self.lock:
+            self.previous = None
+        tracemalloc.stop()
+
+    @staticmethod
+    def _format(stat, with_diff):
+        entry = {
+            "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count
+        }
+        if with_diff:
+            entry["size_diff_kb"] = round(stat.size_diff / 1024, 1)
+            entry["count_diff"] = stat.count_diff
+        return entry
+
+    def snapshot(self, limit=25, group_by="lineno"):
+        """Top allocators now, plus growth since the previous snapshot if there is one"""
+        if not tracemalloc.is_tracing():
+            return None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        current, peak = tracemalloc.get_traced_memory()
+
+        with self.lock:
+            previous = self.previous
+            self.previous = snapshot
+
+        result = {
+            "traced_mb": round(current / (1024 * 1024), 2),
+            "peak_mb": round(peak / (1024 * 1024), 2),
+            "top": [self._format(stat, False) for stat in snapshot.statistics(group_by)[:limit]]
+        }
+        if previous is not None:
+            result["diff"] = [self._format(stat, True) for stat in snapshot.compare_to(previous, group_by)[:limit]]
+        return result
@@ -0,0 +1,130 @@
+import time
+from collections import deque
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from settings import APP_SETTINGS
+
+
+class AdaptiveScheduler:
+    """Chooses the time between analyses from board activity, Gemini latency and a per-source budget"""
+
+    def __init__(self, base_interval=5, min_interval=1, max_interval=60, change_threshold=0.02,
+                 backoff_factor=2.0, latency_factor=1.5, max_per_minute=12):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.change_threshold = change_threshold  # Mean pixel change (0-1) that counts as writing
+        self.backoff_factor = backoff_factor
+        self.latency_factor = latency_factor  # Never schedule faster than this multiple of Gemini latency
+        self.max_per_minute = max_per_minute  # Per-source analysis budget over a sliding minute
+
+        self.interval = base_interval
+        self.latency = None  # Smoothed Gemini latency in seconds
+        self.last_signature = None
+        self.last_change = 0.0
+        self.active = False  # Whether the board changed since the last analysis
+        self.last_analysis_time = 0
+        self.recent_analyses = deque()  # Analysis times within the last minute
+        self.last_seen = time.time()  # Last frame or analysis from this source, for idle eviction
+        self.budget_factor = 1.0  # Interval multiplier while the source is over its token budget
+        self.lock = Lock()
+
+    def _signature(self, frame):
+        """Tiny grayscale thumbnail used to measure frame change cheaply"""
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        thumb = cv2.resize(frame, (64, 48), interpolation=cv2.INTER_AREA)
+        return thumb.astype(np.int16)
+
+    def observe(self, frame):
+        """Measure how much the frame changed since the previous observation and adapt the interval"""
+        signature = self._signature(frame)
+
+        with self.lock:
+            self.last_seen = time.time()
+            if self.last_signature is None:
+                change = 0.0
+            else:
+                change = float(np.mean(np.abs(signature - self.last_signature))) / 255.0
+            self.last_signature = signature
+            self.last_change = change
+
+            if change >= self.change_threshold:
+                # Teacher is writing - keep analyzing more often while the activity lasts
+                self.interval = max(self.min_interval, min(self.interval, self.base_interval) / self.backoff_factor)
+                self.active = True
+
+            return change
+
+    def record_analysis(self, latency=None):
+        """Record a finished analysis and back off if the board stayed static"""
+        with self.lock:
+            if latency is not None:
+                # Exponentially weighted average so one slow call does not dominate
+                self.latency = latency if self.latency is None else 0.7 * self.latency + 0.3 * latency
+
+            if not self.active:
+                self.interval = min(self.max_interval, self.interval * self.backoff_factor)
+            self.active = False
+            self.last_analysis_time = time.time()
+            self.last_seen = self.last_analysis_time
+            self.recent_analyses.append(self.last_analysis_time)
+            while self.recent_analyses and self.recent_analyses[0] <= self.last_analysis_time - 60:
+                self.recent_analyses.popleft()
+
+    def current_interval(self):
+        """Interval to wait before the next analysis, capped by latency and budget, stretched when over budget"""
+        with self.lock:
+            interval = self.interval
+            if self.latency is not None:
+                interval = max(interval, self.latency * self.latency_factor)
+            if self.max_per_minute and len(self.recent_analyses) >= self.max_per_minute:
+                # Budget used up: wait until the oldest analysis counted against it leaves the window
+                window_start = self.recent_analyses[-self.max_per_minute]
+                interval = max(interval, window_start + 60 - self.last_analysis_time)
+            return min(interval, self.max_interval) * self.budget_factor
+
+    def set_budget_factor(self, factor):
+        """Stretch the interval (factor > 1) while the source is over its token budget"""
+        with self.lock:
+            self.budget_factor = factor
+
+    def is_due(self, now=None):
+        """Check whether enough time has passed for the next analysis"""
+        now = time.time() if now is None else now
+        return now - self.last_analysis_time >= self.current_interval()
+
+    def time_until_next(self, now=None):
+        """Seconds remaining until the next analysis is due"""
+        now = time.time() if now is None else now
+        return max(0.0, self.current_interval() - (now - self.last_analysis_time))
+
+    def idle_time(self, now=None):
+        """Seconds since this source last sent a frame or finished an analysis"""
+        now = time.time() if now is None else now
+        return now - self.last_seen
+
+    def status(self):
+        """Summary of scheduler state for the API"""
+        return {
+            "interval": round(self.current_interval(), 2),
+            "activity": round(self.last_change, 4),
+            "active": self.active,
+            "latency": round(self.latency, 2) if self.latency is not None else None,
+            "budgetFactor": self.budget_factor
+        }
+
+
+def create_scheduler(base_interval=None, max_interval=None):
+    """Build a scheduler configured from APP_SETTINGS"""
+    return AdaptiveScheduler(
+        base_interval=base_interval or APP_SETTINGS["analyze_interval"],
+        min_interval=APP_SETTINGS["min_analyze_interval"],
+        max_interval=max_interval or APP_SETTINGS["max_analyze_interval"],
+        change_threshold=APP_SETTINGS["change_threshold"],
+        latency_factor=APP_SETTINGS["latency_factor"],
+        max_per_minute=APP_SETTINGS["max_analyses_per_minute"]
+    )
@@ -0,0 +1,152 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# Sessions evicted from per-session stats are rolled up under this name
+OTHER_SESSIONS = "(other)"
+
+# Long-edge buckets used to see which image sizes drive token cost
+SIZE_BUCKETS = [(512, "<=512px"), (1024, "<=1024px"), (2048, "<=2048px")]
+
+
+def _empty_totals():
+    return {"calls": 0, "images": 0, "input_tokens": 0, "output_tokens": 0, "cost": 0.0, "latency": 0.0}
+
+
+def _size_bucket(size):
+    long_edge = max(size)
+    for limit, name in SIZE_BUCKETS:
+        if long_edge <= limit:
+            return name
+    return ">2048px"
+
+
+class UsageTracker:
+    """Per-call Gemini token, cost and latency accounting with per-session budgets
+
+    Budgets are per client session ID (one browser tab), not per classroom.
+    """
+
+    def __init__(self, input_price=0.10, output_price=0.40, session_token_budget=200000, budget_window=3600,
+                 max_sessions=1000):
+        self.input_price = input_price  # USD per million input tokens
+        self.output_price = output_price  # USD per million output tokens
+        self.session_token_budget = session_token_budget  # Tokens a session may use per budget window (0 = unlimited)
+        self.budget_window = budget_window
+        self.max_sessions = max(1, max_sessions)  # Least recently used sessions beyond this are rolled up
+        self.lock = Lock()
+        self.totals = _empty_totals()
+        self.sessions = OrderedDict()  # Least recently used first
+        self.endpoints = {}
+        self.sizes = {}
+        self.windows = {}  # session -> (window start, tokens used in window)
+        self.last_prune = time.time()
+
+    @staticmethod
+    def _add(totals, calls, images, input_tokens, output_tokens, cost, latency):
+        totals["calls"] += calls
+        totals["images"] += images
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cost"] += cost
+        totals["latency"] += latency
+
+    def record(self, session, endpoint, input_tokens, output_tokens, latency, image_size=None, share=1.0):
+        """Record one image's share of a Gemini call; latency is the full call time the image waited for"""
+        input_tokens = int(round(input_tokens * share))
+        output_tokens = int(round(output_tokens * share))
+        cost = (input_tokens * self.input_price + output_tokens * self.output_price) / 1_000_000
+        session = session or "unknown"
+        endpoint = endpoint or "unknown"
+
+        with self.lock:
+            entry = (share, 1, input_tokens, output_tokens, cost, latency)
+            self._add(self.totals, *entry)
+            self._add(self.sessions.setdefault(session, _empty_totals()), *entry)
+            self.sessions.move_to_end(session)
+            self._add(self.endpoints.setdefault(endpoint, _empty_totals()), *entry)
+            if image_size is not None:
+                self._add(self.sizes.setdefault(_size_bucket(image_size), _empty_totals()), *entry)
+
+            now = time.time()
+            start, used = self.windows.get(session, (now, 0))
+            if now - start >= self.budget_window:
+                start, used = now, 0
+            self.windows[session] = (start, used + input_tokens + output_tokens)
+            self._prune(now)
+
+    def _prune(self, now):
+        """Drop expired budget windows and roll the oldest sessions into one bucket (lock held)"""
+        if now - self.last_prune >= 60:
+            self.last_prune = now
+            for session in [s for s, (start, _) in self.windows.items() if now - start >= self.budget_window]:
+                del self.windows[session]
+
+        while len(self.sessions) > self.max_sessions:
+            session, totals = next(iter(self.sessions.items()))
+            if session == OTHER_SESSIONS:
+                self.sessions.move_to_end(session)
+                continue
+            del self.sessions[session]
+            other = self.sessions.setdefault(OTHER_SESSIONS, _empty_totals())
+            self._add(other, *(totals[key] for key in
+                               ("calls", "images", "input_tokens", "output_tokens", "cost", "latency")))
+
+    def record_response(self, response, elapsed, images, contexts):
+        """Attribute a Gemini response's usage metadata to each image's session and endpoint by pixel share"""
+        metadata = getattr(response, "usage_metadata", None)
+        input_tokens = getattr(metadata, "prompt_token_count", 0) or 0
+        output_tokens = getattr(metadata, "candidates_token_count", 0) or 0
+        print(f"Gemini usage: {input_tokens} input, {output_tokens} output tokens for {len(images)} images")
+
+        total_pixels = sum(image.size[0] * image.size[1] for image in images) or 1
+        for image, context in zip(images, contexts):
+            context = context or {}
+            self.record(context.get("session"), context.get("endpoint"), input_tokens, output_tokens, elapsed,
+                        image_size=image.size, share=image.size[0] * image.size[1] / total_pixels)
+
+    def budget_exceeded(self, session):
+        """Whether the session has used up its token budget for the current window"""
+        if not self.session_token_budget:
+            return False
+        with self.lock:
+            start, used = self.windows.get(session, (0, 0))
+            if time.time() - start >= self.budget_window:
+                return False
+            return used >= self.session_token_budget
+
+    @staticmethod
+    def _summary(totals):
+        summary = dict(totals)
+        summary["calls"] = round(summary["calls"], 2)
+        summary["cost"] = round(summary["cost"], 6)
+        summary["avg_latency"] = round(totals["latency"] / totals["images"], 3) if totals["images"] else None
+        summary["latency"] = round(totals["latency"], 3)
+        summary["tokens_per_image"] = (round((totals["input_tokens"] + totals["output_tokens"]) / totals["images"], 1)
+                                       if totals["images"] else None)
+        return summary
+
+    def status(self, session=None):
+        """Usage totals overall, per session, per endpoint and per image size"""
+        with self.lock:
+            if session is not None:
+                totals = self.sessions.get(session, _empty_totals())
+                start, used = self.windows.get(session, (0, 0))
+                in_window = time.time() - start < self.budget_window
+                return {
+                    "session": session,
+                    "usage": self._summary(totals),
+                    "budget": {
+                        "tokens": self.session_token_budget,
+                        "used": used if in_window else 0,
+                        "window": self.budget_window
+                    }
+                }
+
+            return {
+                "totals": self._summary(self.totals),
+                "sessions": {name: self._summary(t) for name, t in self.sessions.items()},
+                "endpoints": {name: self._summary(t) for name, t in self.endpoints.items()},
+                "imageSizes": {name: self._summary(t) for name, t in self.sizes.items()},
+                "prices": {"input_per_million": self.input_price, "output_per_million": self.output_price}
+            }
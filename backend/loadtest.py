@@ -0,0 +1,309 @@
+"""Load generator that replays captured frames against /process_image and reports capacity metrics.
+
+--frames takes a directory of whiteboard JPEG/PNG images or recorded /process_image JSON bodies
+(archived camera segments are video and cannot be replayed).
+
+Example (starts a local server with a fake Gemini that takes ~1.5s and fails 5% of the time):
+
+    python loadtest.py --frames sample_frames --rate 4 --concurrency 16 --sessions 10 \
+        --duration 120 --launch --fake-latency 1.5 --fake-error-rate 0.05
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+import requests
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def load_bodies(directory):
+    """Load request bodies from captured images or recorded /process_image JSON bodies"""
+    bodies = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        lower = name.lower()
+        if lower.endswith(IMAGE_EXTENSIONS):
+            with open(path, "rb") as f:
+                bodies.append({"image": base64.b64encode(f.read()).decode("ascii")})
+        elif lower.endswith(".json"):
+            with open(path) as f:
+                body = json.load(f)
+            if "image" in body:
+                bodies.append(body)
+    return bodies
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class ServerMonitor(threading.Thread):
+    """Samples RSS and CPU of the server process (and its children) over time"""
+
+    def __init__(self, pid, interval=1.0):
+        super().__init__(name="server_monitor", daemon=True)
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.samples = []  # (elapsed seconds, rss bytes, cpu percent)
+        self.running = True
+        self.start_time = time.time()
+
+    def _processes(self):
+        try:
+            return [self.process] + self.process.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def run(self):
+        for proc in self._processes():
+            proc.cpu_percent(None)  # Prime CPU counters
+
+        while self.running:
+            time.sleep(self.interval)
+            rss = 0
+            cpu = 0.0
+            for proc in self._processes():
+                try:
+                    rss += proc.memory_info().rss
+                    cpu += proc.cpu_percent(None)
+                except psutil.NoSuchProcess:
+                    continue
+            self.samples.append((time.time() - self.start_time, rss, cpu))
+
+    def latest(self):
+        return self.samples[-1] if self.samples else None
+
+
+class LoadGenerator:
+    """Open-loop request generator: sends at a fixed rate, bounded by client concurrency"""
+
+    def __init__(self, url, bodies, rate, concurrency, sessions, timeout):
+        self.url = url.rstrip("/") + "/process_image"
+        self.bodies = bodies
+        self.rate = rate
+        self.sessions = sessions
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="load")
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.results = []  # (send time, latency, outcome)
+        self.skipped = 0  # Requests not sent because every client slot was busy
+
+    def _http(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+    def _send(self, sequence):
+        body = dict(self.bodies[sequence % len(self.bodies)])
+        body["session_id"] = f"loadtest-{sequence % self.sessions}"
+
+        start = time.time()
+        try:
+            response = self._http().post(self.url, json=body, timeout=self.timeout)
+            outcome = str(response.status_code)
+            if response.status_code == 200:
+                outcome = response.json().get("status", "200")
+        except requests.RequestException as e:
+            outcome = f"connection_error ({type(e).__name__})"
+        finally:
+            self.slots.release()
+
+        with self.lock:
+            self.results.append((start, time.time() - start, outcome))
+
+    def run(self, duration):
+        """Send requests for `duration` seconds, then wait for outstanding ones"""
+        start = time.time()
+        sequence = 0
+        while True:
+            next_send = start + sequence / self.rate
+            if next_send - start >= duration:
+                break
+            delay = next_send - time.time()
+            if delay > 0:
+                time.sleep(delay)
+
+            if self.slots.acquire(blocking=False):
+                self.executor.submit(self._send, sequence)
+            else:
+                with self.lock:
+                    self.skipped += 1
+            sequence += 1
+
+        self.executor.shutdown(wait=True)
+        return time.time() - start
+
+    def window(self, since):
+        """Results of requests that finished after `since`"""
+        with self.lock:
+            return [r for r in self.results if r[0] + r[1] >= since]
+
+
+def summarize(results, elapsed, skipped, monitor):
+    latencies = [latency for _, latency, outcome in results if outcome == "success"]
+    outcomes = {}
+    for _, _, outcome in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    summary = {
+        "duration": elapsed,
+        "sent": len(results),
+        "skipped_client_saturated": skipped,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "outcomes": outcomes,
+        "rate_429": outcomes.get("429", 0) / len(results) if results else 0.0,
+        "error_rate": sum(count for outcome, count in outcomes.items()
+                          if outcome not in ("success", "dropped")) / len(results) if results else 0.0,
+        "latency": {
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies) if latencies else None
+        }
+    }
+
+    if monitor is not None and monitor.samples:
+        summary["server"] = {
+            "peak_rss_mb": max(s[1] for s in monitor.samples) / (1024 * 1024),
+            "mean_cpu_percent": sum(s[2] for s in monitor.samples) / len(monitor.samples),
+            "samples": [{"t": round(t, 1), "rss_mb": round(rss / (1024 * 1024), 1), "cpu_percent": cpu}
+                        for t, rss, cpu in monitor.samples]
+        }
+    return summary
+
+
+def report_progress(generator, monitor, interval, stop):
+    """Print per-interval throughput, latency and server resource usage"""
+    last = time.time()
+    while not stop.wait(interval):
+        now = time.time()
+        window = generator.window(last)
+        ok = [latency for _, latency, outcome in window if outcome == "success"]
+        errors = sum(1 for _, _, outcome in window if outcome not in ("success", "dropped"))
+        line = (f"[{time.strftime('%H:%M:%S')}] {len(ok) / (now - last):.2f} ok/s, "
+                f"p50 {percentile(ok, 50) or 0:.2f}s, p95 {percentile(ok, 95) or 0:.2f}s, "
+                f"errors {errors}, skipped {generator.skipped}")
+        sample = monitor.latest() if monitor is not None else None
+        if sample:
+            line += f", server rss {sample[1] / (1024 * 1024):.0f}MB cpu {sample[2]:.0f}%"
+        print(line)
+        last = now
+
+
+def launch_server(port, fake_latency, fake_error_rate):
+    """Start app.py with a fake Gemini and wait until it answers"""
+    env = dict(os.environ, PORT=str(port),
+               FAKE_GEMINI_LATENCY=str(fake_latency), FAKE_GEMINI_ERROR_RATE=str(fake_error_rate))
+    process = subprocess.Popen([sys.executable, "app.py"], cwd=os.path.dirname(os.path.abspath(__file__)), env=env)
+
+    url = f"http://localhost:{port}"
+    deadline = time.time() + 180  # YOLO model loading can take a while
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{url}/api/status", timeout=2).ok:
+                print(f"Server ready at {url} (pid {process.pid})")
+                return process, url
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("Server exited during startup")
+        time.sleep(1)
+
+    process.terminate()
+    raise RuntimeError("Server did not become ready in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured frames against the analyzer API")
+    parser.add_argument("--url", default="http://localhost:8888", help="Backend base URL")
+    parser.add_argument("--frames", required=True, help="Directory of images or recorded JSON request bodies")
+    parser.add_argument("--rate", type=float, default=1.0, help="Target requests per second")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max requests in flight")
+    parser.add_argument("--sessions", type=int, default=1, help="Number of simulated classrooms")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to generate load")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--report-interval", type=float, default=5, help="Seconds between progress lines")
+    parser.add_argument("--server-pid", type=int, help="PID of the server to sample RSS/CPU from")
+    parser.add_argument("--launch", action="store_true", help="Start a local server with a fake Gemini")
+    parser.add_argument("--port", type=int, default=8899, help="Port for --launch")
+    parser.add_argument("--fake-latency", type=float, default=1.0, help="Fake Gemini latency for --launch")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0, help="Fake Gemini error rate for --launch")
+    parser.add_argument("--json-out", help="Write the full summary to this file")
+    args = parser.parse_args()
+
+    bodies = load_bodies(args.frames)
+    if not bodies:
+        print(f"No images or request bodies found in {args.frames}")
+        return 1
+    print(f"Loaded {len(bodies)} request bodies")
+
+    server = None
+    url = args.url
+    pid = args.server_pid
+    if args.launch:
+        server, url = launch_server(args.port, args.fake_latency, args.fake_error_rate)
+        pid = server.pid
+
+    monitor = ServerMonitor(pid) if pid else None
+    if monitor is not None:
+        monitor.start()
+
+    generator = LoadGenerator(url, bodies, args.rate, args.concurrency, args.sessions, args.timeout)
+    stop = threading.Event()
+    reporter = threading.Thread(target=report_progress, args=(generator, monitor, args.report_interval, stop),
+                                daemon=True)
+    reporter.start()
+
+    try:
+        print(f"Sending {args.rate} req/s for {args.duration}s across {args.sessions} sessions...")
+        elapsed = generator.run(args.duration)
+    finally:
+        stop.set()
+        if monitor is not None:
+            monitor.running = False
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary = summarize(generator.results, elapsed, generator.skipped, monitor)
+
+    latency = summary["latency"]
+    print("\n=== Load test summary ===")
+    print(f"Sent {summary['sent']} requests in {elapsed:.1f}s "
+          f"({summary['skipped_client_saturated']} skipped with all client slots busy)")
+    print(f"Throughput: {summary['throughput']:.2f} successful analyses/s")
+    if latency["p50"] is not None:
+        print(f"Latency p50 {latency['p50']:.2f}s, p90 {latency['p90']:.2f}s, "
+              f"p95 {latency['p95']:.2f}s, p99 {latency['p99']:.2f}s, max {latency['max']:.2f}s")
+    print(f"Outcomes: {summary['outcomes']}")
+    print(f"429 rate: {summary['rate_429']:.1%}, error rate: {summary['error_rate']:.1%}")
+    if "server" in summary:
+        print(f"Server peak RSS {summary['server']['peak_rss_mb']:.0f}MB, "
+              f"mean CPU {summary['server']['mean_cpu_percent']:.0f}%")
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.json_out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -48,8 +48,42 @@ Provide clear explanations that help students understand the broader context and
 
 # Application settings
 APP_SETTINGS = {
-    "analyze_interval": 5,  # Seconds between analyses
+    "analyze_interval": 5,  # Starting seconds between analyses
+    "min_analyze_interval": 1,  # Fastest interval while the board is being written on
+    "max_analyze_interval": 60,  # Slowest interval once the board has been static for a while
+    "remote_max_analyze_interval": 10,  # Slowest interval for API clients, whose activity is only seen on sent frames
+    "change_threshold": 0.02,  # Mean frame change (0-1) treated as writing activity
+    "latency_factor": 1.5,  # Interval is never shorter than this multiple of Gemini latency
+    "max_analyses_per_minute": 12,  # Per-source analysis budget
+    "scheduler_idle_timeout": 600,  # Seconds without frames (10x the slowest interval) before a source's scheduler is dropped
     "confidence_threshold": 0.3,  # YOLO detection confidence threshold
     "max_regions": 2,  # Maximum regions to analyze per frame
+    "analysis_workers": 4,  # Frames analyzed concurrently across all clients
+    "frame_deadline": 10,  # Seconds a queued frame stays useful before it is dropped
+    "gemini_batch_size": 8,  # Max region crops per Gemini request (1 disables batching)
+    "gemini_batch_window": 0.1,  # Seconds to gather crops from concurrent requests into one batch
+    "gemini_input_price": 0.10,  # USD per million input tokens, for cost estimates
+    "gemini_output_price": 0.40,  # USD per million output tokens
+    "session_token_budget": 200000,  # Gemini tokens per client session ID (one browser tab) per window; 0 disables
+    "session_budget_window": 3600,  # Seconds after which a session's token budget resets
+    "usage_max_sessions": 1000,  # Sessions kept in usage stats; older ones are rolled up as "(other)"
+    "budget_max_image_edge": 768,  # Longest crop side sent to Gemini while a session is over budget
+    "budget_max_regions": 1,  # Regions analyzed per frame while over budget
+    "budget_interval_factor": 2.0,  # Analysis interval multiplier while over budget
+    "local_ocr_enabled": True,  # Answer plain-text regions with the in-process OCR engine
+    "local_ocr_min_confidence": 0.85,  # Mean OCR score needed to skip Gemini
+    "local_ocr_max_words": 40,  # Longer text is escalated to Gemini for an explanation
+    "capture_max_edge": 1280,  # Longest side clients should capture at (never below the detector input size)
+    "capture_jpeg_quality": 0.8,  # JPEG quality (0-1) clients should encode with
+    "capture_roi": None,  # Optional normalized {"x", "y", "width", "height"} region clients should crop to
+    "frame_pool_size": 4,  # Preallocated capture buffers per camera
+    "archive_fps": 10,  # Frame rate of archived video segments
+    "archive_segment_seconds": 60,  # Length of each archived video segment
+    "archive_max_bytes": 500 * 1024 * 1024,  # Total archive size before oldest segments are removed
+    "archive_max_age": 7 * 24 * 3600,  # Seconds to keep archived segments
+    "archive_queue_size": 32,  # Frames buffered for the archive writer before dropping the oldest
+    "history_db": "analysis_history.db",  # SQLite file of past analyses (relative to backend/)
+    "history_batch_size": 50,  # Records written per history transaction
+    "history_flush_interval": 1.0,  # Max seconds before pending history records are written
     "model": "gemini-2.0-flash"  # Default Gemini model
 }
\ No newline at end of file
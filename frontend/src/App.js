@@ -28,6 +28,16 @@ import ReactMarkdown from 'react-markdown';
 
 // API URL configuration - ensure this matches your backend port
 const API_URL = 'http://localhost:8888';
+const WS_URL = API_URL.replace(/^http/, 'ws') + '/ws';
+
+function getSessionId() {
+  let id = window.sessionStorage.getItem('sessionId');
+  if (!id) {
+    id = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    window.sessionStorage.setItem('sessionId', id);
+  }
+  return id;
+}
 
 function App() {
   // Define color scheme for light and dark modes
@@ -48,7 +58,12 @@ function App() {
 
   // Auto-capture is disabled by default now
   const [autoCapture, setAutoCapture] = useState(false);
-  const [captureInterval, setCaptureInterval] = useState(5000); // 5 seconds by default
+  // 5 seconds by default, then follows the interval chosen by the backend scheduler
+  const [captureInterval, setCaptureInterval] = useState(5000);
+
+  // Identifies this tab so the backend can adapt its schedule and token budget per session;
+  // kept in sessionStorage so a reload does not start a fresh session
+  const sessionId = useRef(getSessionId());
 
   // Update window dimensions when resized
   useEffect(() => {
@@ -63,13 +78,147 @@ function App() {
     return () => window.removeEventListener('resize', handleResize);
   }, []);
 
+  // Capture profile negotiated with the backend (resolution, JPEG quality, region of interest)
+  const [captureProfile, setCaptureProfile] = useState(null);
+  const captureProfileRef = useRef(null);
+
+  useEffect(() => {
+    const loadCaptureProfile = async () => {
+      try {
+        const response = await fetch(`${API_URL}/api/capabilities`);
+        if (!response.ok) {
+          throw new Error(`Server responded with status: ${response.status}`);
+        }
+        const profile = await response.json();
+        console.log("Capture profile:", profile);
+        captureProfileRef.current = profile;
+        setCaptureProfile(profile);
+      } catch (error) {
+        // Keep capturing at full resolution if the backend cannot tell us otherwise
+        console.warn("Could not load capture profile:", error);
+      }
+    };
+
+    loadCaptureProfile();
+  }, []);
+
+  // Map boxes from the captured region of interest back onto the full camera view
+  const mapToCameraView = (detections) => {
+    const roi = captureProfileRef.current && captureProfileRef.current.roi;
+    if (!roi) return detections;
+
+    return detections.map((det) => ({
+      ...det,
+      boundingBox: {
+        x: roi.x + det.boundingBox.x * roi.width,
+        y: roi.y + det.boundingBox.y * roi.height,
+        width: det.boundingBox.width * roi.width,
+        height: det.boundingBox.height * roi.height
+      }
+    }));
+  };
+
+  // WebSocket channel to the backend; frames are only sent when the server asks for one
+  const socketRef = useRef(null);
+  const frameRequestedRef = useRef(false);
+  const autoCaptureRef = useRef(autoCapture);
+  const [socketConnected, setSocketConnected] = useState(false);
+
+  useEffect(() => {
+    autoCaptureRef.current = autoCapture;
+  }, [autoCapture]);
+
+  // Update the UI with an analysis result, whichever channel it arrived on
+  const handleResult = (result) => {
+    console.log("Received analysis result:", result);
+
+    // Follow the adaptive interval reported by the backend
+    if (result.nextInterval) {
+      setCaptureInterval(Math.round(result.nextInterval * 1000));
+    }
+
+    if (result.status === "dropped") {
+      // A newer frame replaced this one or it waited past its deadline; keep the current detections
+      console.log(`Frame dropped by server: ${result.reason}`);
+      return;
+    }
+
+    if (result.status === "success" && result.detections && result.detections.length > 0) {
+      setDetections(mapToCameraView(result.detections));
+      toast({
+        title: "Analysis complete",
+        description: `Found ${result.detections.length} regions`,
+        status: "success",
+        duration: 3000,
+        isClosable: true,
+      });
+    } else if (result.status === "error") {
+      throw new Error(result.message || "Could not process the image");
+    } else {
+      console.warn("No detections found in response:", result);
+      // Clear previous detections if none were found
+      setDetections([]);
+      toast({
+        title: "No content detected",
+        description: "Try adjusting the camera position",
+        status: "info",
+        duration: 3000,
+        isClosable: true,
+      });
+    }
+  };
+
+  const handleError = (error) => {
+    console.error("Error analyzing image:", error);
+    toast({
+      title: "Analysis failed",
+      description: error.message || "Could not process the image",
+      status: "error",
+      duration: 5000,
+      isClosable: true,
+    });
+    // Clear any previous detections when there's an error
+    setDetections([]);
+  };
+
+  // Fallback path when the WebSocket is unavailable: POST the frame as base64 JSON
+  const postFrame = async (blob) => {
+    const base64Data = await new Promise((resolve, reject) => {
+      const reader = new FileReader();
+      reader.onloadend = () => resolve(reader.result.split(',')[1]);
+      reader.onerror = reject;
+      reader.readAsDataURL(blob);
+    });
+
+    const response = await fetch(`${API_URL}/process_image`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ image: base64Data, session_id: sessionId.current })
+    });
+
+    if (!response.ok) {
+      throw new Error(`Server responded with status: ${response.status}`);
+    }
+
+    handleResult(await response.json());
+  };
+
   // When a frame is captured, send it to the backend
-  const handleCaptureFrame = async (base64Data) => {
+  const handleCaptureFrame = async (blob) => {
     if (isProcessing) {
       console.log("Already processing a frame, skipping this capture");
       return;
     }
 
+    const socket = socketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      if (!frameRequestedRef.current) {
+        console.log("Server has not requested a frame yet, skipping this capture");
+        return;
+      }
+      frameRequestedRef.current = false;
+    }
+
     setIsProcessing(true);
     toast({
       title: "Analyzing whiteboard",
@@ -79,52 +228,16 @@ function App() {
       isClosable: true,
     });
 
-    try {
-      const response = await fetch(`${API_URL}/process_image`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ image: base64Data })
-      });
-
-      if (!response.ok) {
-        throw new Error(`Server responded with status: ${response.status}`);
-      }
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      // Binary frame; the result is pushed back on the socket
+      socket.send(blob);
+      return;
+    }
 
-      const result = await response.json();
-      console.log("Received analysis result:", result);
-
-      if (result.status === "success" && result.detections && result.detections.length > 0) {
-        setDetections(result.detections);
-        toast({
-          title: "Analysis complete",
-          description: `Found ${result.detections.length} regions`,
-          status: "success",
-          duration: 3000,
-          isClosable: true,
-        });
-      } else {
-        console.warn("No detections found in response:", result);
-        // Clear previous detections if none were found
-        setDetections([]);
-        toast({
-          title: "No content detected",
-          description: "Try adjusting the camera position",
-          status: "info",
-          duration: 3000,
-          isClosable: true,
-        });
-      }
+    try {
+      await postFrame(blob);
     } catch (error) {
-      console.error("Error analyzing image:", error);
-      toast({
-        title: "Analysis failed",
-        description: error.message || "Could not process the image",
-        status: "error",
-        duration: 5000,
-        isClosable: true,
-      });
-      // Clear any previous detections when there's an error
-      setDetections([]);
+      handleError(error);
     } finally {
       setIsProcessing(false);
     }
@@ -145,10 +258,82 @@ function App() {
   // Create a ref to access CameraFeed methods (capture & toggle)
   const cameraRef = useRef();
 
-  // Auto-capture functionality - only activated if enabled
+  // Keep a persistent WebSocket open, reconnecting if it drops
+  useEffect(() => {
+    let closed = false;
+    let reconnectTimer;
+    let captureTimer;
+
+    const connect = () => {
+      const socket = new WebSocket(`${WS_URL}?session_id=${sessionId.current}`);
+      socketRef.current = socket;
+
+      socket.onopen = () => {
+        console.log("WebSocket connected");
+        setSocketConnected(true);
+      };
+
+      socket.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+
+        if (message.type === "request_frame") {
+          frameRequestedRef.current = true;
+          // In auto mode the server's request paces capture
+          if (autoCaptureRef.current) {
+            clearTimeout(captureTimer);
+            captureTimer = setTimeout(() => {
+              if (cameraRef.current && autoCaptureRef.current) {
+                cameraRef.current.captureFrame();
+              }
+            }, (message.delay || 0) * 1000);
+          }
+        } else if (message.type === "result") {
+          setIsProcessing(false);
+          try {
+            handleResult(message);
+          } catch (error) {
+            handleError(error);
+          }
+        } else if (message.type === "error") {
+          setIsProcessing(false);
+          handleError(new Error(message.message));
+        }
+      };
+
+      socket.onclose = () => {
+        console.log("WebSocket closed");
+        setSocketConnected(false);
+        setIsProcessing(false);
+        frameRequestedRef.current = false;
+        if (!closed) {
+          reconnectTimer = setTimeout(connect, 2000);
+        }
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      clearTimeout(captureTimer);
+      if (socketRef.current) {
+        socketRef.current.close();
+      }
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, []);
+
+  // Start auto-capture over the socket as soon as it is enabled, if the server is waiting for a frame
+  useEffect(() => {
+    if (autoCapture && socketConnected && frameRequestedRef.current && cameraRef.current) {
+      cameraRef.current.captureFrame();
+    }
+  }, [autoCapture, socketConnected]);
+
+  // Auto-capture functionality when the WebSocket is unavailable - only activated if enabled
   useEffect(() => {
     let interval;
-    if (autoCapture) {
+    if (autoCapture && !socketConnected) {
       interval = setInterval(() => {
         if (cameraRef.current && !isProcessing) {
           cameraRef.current.captureFrame();
@@ -162,7 +347,7 @@ function App() {
         clearInterval(interval);
       }
     };
-  }, [autoCapture, isProcessing, captureInterval]);
+  }, [autoCapture, isProcessing, captureInterval, socketConnected]);
 
   // Function to toggle auto-capture mode
   const toggleAutoCapture = () => {
@@ -250,7 +435,7 @@ function App() {
         height="100vh"
         overflow="hidden"
       >
-        <CameraFeed ref={cameraRef} onCaptureFrame={handleCaptureFrame} />
+        <CameraFeed ref={cameraRef} onCaptureFrame={handleCaptureFrame} captureProfile={captureProfile} />
 
         {/* Processing indicator - more subtle in auto mode */}
         {isProcessing && (
@@ -2,7 +2,7 @@
 import React, {forwardRef, useEffect, useImperativeHandle, useRef, useState} from 'react';
 import {Box, useToast} from '@chakra-ui/react';
 
-const CameraFeed = forwardRef(({ onCaptureFrame }, ref) => {
+const CameraFeed = forwardRef(({ onCaptureFrame, captureProfile }, ref) => {
   const videoRef = useRef(null);
   const [stream, setStream] = useState(null);
   const [facingMode, setFacingMode] = useState('environment'); // Default to back camera
@@ -103,19 +103,29 @@ const CameraFeed = forwardRef(({ onCaptureFrame }, ref) => {
     const video = videoRef.current;
     const canvas = document.createElement('canvas');
 
-    // Use the actual video dimensions for highest quality capture
-    canvas.width = video.videoWidth;
-    canvas.height = video.videoHeight;
+    // Crop to the server's region of interest, if any
+    const roi = (captureProfile && captureProfile.roi) || { x: 0, y: 0, width: 1, height: 1 };
+    const sx = roi.x * video.videoWidth;
+    const sy = roi.y * video.videoHeight;
+    const sw = roi.width * video.videoWidth;
+    const sh = roi.height * video.videoHeight;
 
-    const ctx = canvas.getContext('2d');
-    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
-
-    // Quality parameter for JPEG compression (0.8 = 80% quality)
-    const dataURL = canvas.toDataURL('image/jpeg', 0.9);
-    const base64Data = dataURL.split(',')[1];
+    // Only upload as many pixels as the backend pipeline uses (never upscale)
+    const maxEdge = captureProfile && captureProfile.maxEdge;
+    const scale = maxEdge ? Math.min(1, maxEdge / Math.max(sw, sh)) : 1;
+    canvas.width = Math.round(sw * scale);
+    canvas.height = Math.round(sh * scale);
 
-    console.log(`Captured frame: ${canvas.width}x${canvas.height}`);
-    onCaptureFrame(base64Data);
+    const ctx = canvas.getContext('2d');
+    ctx.drawImage(video, sx, sy, sw, sh, 0, 0, canvas.width, canvas.height);
+
+    // Encode straight to a binary JPEG blob so it can be sent without base64
+    const quality = (captureProfile && captureProfile.jpegQuality) || 0.9;
+    canvas.toBlob((blob) => {
+      if (!blob) return;
+      console.log(`Captured frame: ${canvas.width}x${canvas.height}, ${blob.size} bytes`);
+      onCaptureFrame(blob);
+    }, 'image/jpeg', quality);
   };
 
   const toggleCamera = () => {